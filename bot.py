@@ -1,20 +1,25 @@
 import asyncio
+import functools
+import hashlib
+import json
 import os
 import sys
 import random
 from pathlib import Path
+from dataclasses import dataclass, replace
 import discord
 from discord.ext import commands
 from dotenv import load_dotenv
 from PIL import Image
 from io import BytesIO
-from typing import Tuple, Optional  
+from typing import Tuple, Optional, List, Dict, Any, BinaryIO, Union, Callable
 from config.config import ConfigManager
 from storage.repository import ImageRepository
-from interface.command_parser import CommandParser
-from core.effect_processor import EffectProcessor
+from interface.command_parser import CommandParser, ParsedCommand
+from core.effect_processor import EffectProcessor, RANDOM_EFFECTS
 from core.animation_processor import AnimationProcessor
 from core.ascii_processor import ASCIIProcessor
+from core.utils import ImageUtils
 
 # Load environment variables
 load_dotenv()
@@ -31,22 +36,146 @@ intents.message_content = True
 intents.reactions = True
 bot = commands.Bot(command_prefix='!', intents=intents, help_command=None)
 
-async def get_input_image(ctx, repository, command) -> Tuple[Optional[bytes], str]:
+# Bounds how many renders run at once so bursts of commands cannot exhaust memory
+_heavy_jobs = asyncio.Semaphore(max(1, (os.cpu_count() or 2) // 2))
+
+# Image listings for --random, keyed by (directory, mtime_ns)
+IMAGE_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
+_image_list_cache: Dict[Tuple[str, int], List[Path]] = {}
+
+@functools.lru_cache(maxsize=8)
+def _read_file_cached(path: str, mtime_ns: int, size: int) -> bytes:
+    """
+    Read a local image file, memoized on its path and stat signature.
+    
+    The mtime/size arguments are only part of the cache key so that an
+    edited file is picked up on the next call.
+    """
+    return Path(path).read_bytes()
+
+def _read_image_file(path: Path) -> bytes:
+    """Return the bytes of a local image file, served from cache when unchanged."""
+    st = path.stat()
+    return _read_file_cached(str(path), st.st_mtime_ns, st.st_size)
+
+def _list_images(images_dir: Path) -> List[Path]:
+    """
+    List image files in a directory, rescanning only when its mtime changes.
+    """
+    key = (str(images_dir), images_dir.stat().st_mtime_ns)
+    files = _image_list_cache.get(key)
+    if files is None:
+        with os.scandir(images_dir) as entries:
+            files = [Path(entry.path) for entry in entries
+                     if entry.name.rpartition('.')[2].lower() in IMAGE_EXTENSIONS
+                     and entry.is_file()]
+        _image_list_cache.clear()
+        _image_list_cache[key] = files
+    return files
+
+async def _run_heavy(ctx, func: Callable[..., Any], *args: Any) -> Any:
+    """
+    Run a CPU-heavy job in a worker thread, bounded by _heavy_jobs.
+    
+    Lets the user know when the job has to wait for a free slot.
+    """
+    if _heavy_jobs.locked():
+        await ctx.send("Queued, waiting for a free worker...")
+    async with _heavy_jobs:
+        return await asyncio.to_thread(func, *args)
+
+def _content_key(image_bytes: bytes, spec: Any) -> str:
+    """
+    Hash an input image together with the canonicalized spec applied to it.
+    
+    Identical requests map to the same key, so a stored output can be served
+    straight from the repository instead of being rendered again.
+    """
+    digest = hashlib.blake2b(image_bytes, digest_size=16)
+    digest.update(json.dumps(spec, sort_keys=True).encode())
+    return digest.hexdigest()
+
+def _run_effects(image_input: Union[bytes, BinaryIO], effects: List[Tuple[str, Dict[str, Any]]]) -> bytes:
+    """
+    Apply an effect chain to an image and return the encoded PNG.
+    
+    Runs synchronously; callers should offload it with asyncio.to_thread so
+    the event loop stays responsive during PIL/NumPy work.
+    """
+    processor = EffectProcessor(image_input, history_enabled=False)
+    processor.apply_effects_batch(effects)
+        
+    return ImageUtils.encode_png(processor.current_image,
+                                 compress_level=config.processing.png_compression)
+
+def _run_ascii(image_input: BinaryIO, ascii_params: Dict[str, Any]) -> Tuple[bytes, List[str]]:
+    """Convert an image to ASCII art and return the rendered PNG plus text lines."""
+    processor = ASCIIProcessor()
+    image = Image.open(image_input)
+    ascii_art = processor.convert_to_ascii(
+        image,
+        cols=ascii_params.get('cols', 80),
+        scale=ascii_params.get('scale', 0.43),
+        detailed=True
+    )
+    
+    # Antialiased text on a flat background only needs a few grey levels, so a
+    # 16-colour palette lets the PNG encoder write 4-bit indexed data. Fast
+    # octree finds it several times quicker than the default median cut
+    ascii_image = processor.create_frame_image(ascii_art)
+    ascii_image = ascii_image.quantize(colors=16, method=Image.Quantize.FASTOCTREE)
+    output_bytes = BytesIO()
+    ascii_image.save(output_bytes, format='PNG',
+                     compress_level=config.processing.png_compression, optimize=False)
+    return output_bytes.getvalue(), ascii_art
+
+def _run_ascii_animation(images: List[bytes]) -> bytes:
+    """
+    Convert each image to an ASCII frame and encode the frames as a looping GIF.
+    
+    Every frame is mapped onto one palette computed from the first frame, so
+    the GIF writer does not re-quantize each frame independently.
+    """
+    processor = ASCIIProcessor()
+    
+    # Convert each image to ASCII frame
+    frames = []
+    for image_bytes in images:
+        ascii_lines = processor.convert_to_ascii(Image.open(BytesIO(image_bytes)))
+        frames.append(processor.create_frame_image(ascii_lines))
+        
+    palette_frame = frames[0].quantize(colors=16, method=Image.Quantize.FASTOCTREE)
+    frames = [palette_frame] + [
+        frame.quantize(palette=palette_frame, dither=Image.Dither.NONE)
+        for frame in frames[1:]
+    ]
+    
+    # The frames already share one small palette, so the writer's palette
+    # optimization pass has nothing to remove and is skipped
+    output_bytes = BytesIO()
+    frames[0].save(output_bytes, format='GIF', save_all=True,
+                   append_images=frames[1:], duration=100, loop=0, optimize=False)
+    return output_bytes.getvalue()
+
+async def get_input_image(ctx, repository, command) -> Tuple[BinaryIO, str]:
     """
     Get input image from various sources.
     
     Priority:
     1. Uploaded image
     2. Random image if --random flag
-    3. Repository image if remix command
-    4. Default input.png
+    3. Default input.png
+    
+    Remixes pass their repository image to _dispatch directly.
     
     Returns:
-        Tuple of (image_bytes, source_description)
+        Tuple of (image_stream, source_description)
     """
-    # Check for uploaded image
+    # Check for uploaded image; stream it so PIL can decode from the buffer
     if ctx.message.attachments:
-        return (await ctx.message.attachments[0].read(), "uploaded image")
+        buf = BytesIO()
+        await ctx.message.attachments[0].save(buf)
+        return (buf, "uploaded image")
         
     # Check for random flag
     if hasattr(command, 'random') and command.random:
@@ -54,33 +183,19 @@ async def get_input_image(ctx, repository, command) -> Tuple[Optional[bytes], st
         if not images_dir.exists():
             raise ValueError("Images directory not found")
             
-        image_files = [f for f in images_dir.glob("*") 
-                      if f.suffix.lower() in {'.png', '.jpg', '.jpeg', '.gif'}]
+        image_files = _list_images(images_dir)
         if not image_files:
             raise ValueError("No images found in images directory")
             
         random_image = random.choice(image_files)
-        with open(random_image, 'rb') as f:
-            return (f.read(), f"random image: {random_image.name}")
-            
-    # Check for remix command
-    if ctx.message.content.startswith('!remix'):
-        try:
-            image_id = int(ctx.message.content.split()[1])
-            image_data = repository.get_image(image_id)
-            if not image_data:
-                raise ValueError(f"Image with ID {image_id} not found")
-            return (image_data['image'], f"remixed image ID: {image_id}")
-        except (IndexError, ValueError) as e:
-            raise ValueError("Invalid remix command. Use: !remix <image_id>")
+        return (BytesIO(_read_image_file(random_image)), f"random image: {random_image.name}")
             
     # Default to input.png
     input_path = Path("input.png")
     if not input_path.exists():
         raise ValueError("No image provided and input.png not found")
         
-    with open(input_path, 'rb') as f:
-        return (f.read(), "input.png")
+    return (BytesIO(_read_image_file(input_path)), "input.png")
 
 @bot.event
 async def on_ready():
@@ -100,221 +215,177 @@ async def ascii_animate_command(ctx, *args):
             await ctx.send("Please attach images for animation")
             return
             
-        processor = ASCIIProcessor()
-        frames = []
-        
-        # Convert each image to ASCII frame
-        for attachment in ctx.message.attachments:
-            image_bytes = await attachment.read()
-            img = Image.open(io.BytesIO(image_bytes))
-            ascii_lines = processor.convert_to_ascii(img)
-            frame = processor.create_frame_image(ascii_lines)
-            frames.append(frame)
-        
-        # Save as animation
-        frames[0].save("ascii_animation.gif", save_all=True, append_images=frames[1:], duration=100, loop=0)
-        await ctx.send(file=discord.File("ascii_animation.gif"))
+        images = [await attachment.read() for attachment in ctx.message.attachments]
+        gif_bytes = await _run_heavy(ctx, _run_ascii_animation, images)
+        await ctx.send(file=discord.File(BytesIO(gif_bytes), filename="ascii_animation.gif"))
             
     except Exception as e:
         await ctx.send(f"Error creating ASCII animation: {str(e)}")
-@bot.command(name='image')
-async def image_command(ctx, *args):
-    """Process an image with effects."""
-    try:
-        # Parse command
-        command = command_parser.parse_command(' '.join(args))
-        
-        # Get input image
-        try:
-            image_bytes, source = await get_input_image(ctx, repository, command)
-        except ValueError as e:
-            await ctx.send(str(e))
-            return
 
-        # Process image
-        processor = EffectProcessor(image_bytes)
-        for effect_name, params in command.effects:
-            processor.apply_effect(effect_name, params)
+@dataclass(frozen=True)
+class Pipeline:
+    """Per-command settings for the shared _dispatch coroutine."""
+    runner: Callable[[BinaryIO, ParsedCommand], Tuple[bytes, Dict[str, bytes]]]
+    filename: str
+    title: str
+    label: str
+    error: str
+    tags: Tuple[str, ...] = ()
+    parameters: Callable[[ParsedCommand], Dict[str, Any]] = lambda command: dict(command.effects)
+    status: Optional[str] = None
+    dedup: bool = False
 
-        # Save and send result
-        output = processor.get_current_image()
-        output_bytes = BytesIO()
-        output.save(output_bytes, format='PNG')
-        output_bytes.seek(0)
-        
-        # Store in repository if configured
-        if command.tags:
-            image_id = repository.store_image(
-                image=output_bytes.getvalue(),
-                title=f"Processed_{ctx.author.name}",
-                creator_id=str(ctx.author.id),
-                creator_name=ctx.author.name,
-                tags=command.tags,
-                parameters=dict(command.effects),
-                source_image=source
-            )
-            await ctx.send(f"Image stored with ID: {image_id}")
+def _image_pipeline(image_input: BinaryIO, command: ParsedCommand) -> Tuple[bytes, Dict[str, bytes]]:
+    """Apply the command's effect chain."""
+    return _run_effects(image_input, command.effects), {}
 
-        # Send processed image
-        output_bytes.seek(0)
-        await ctx.send(file=discord.File(output_bytes, filename="processed.png"))
+def _ascii_pipeline(image_input: BinaryIO, command: ParsedCommand) -> Tuple[bytes, Dict[str, bytes]]:
+    """Render ASCII art, attaching the raw text alongside the image."""
+    output_png, ascii_art = _run_ascii(image_input, command.ascii_params)
+    return output_png, {"ascii.txt": '\n'.join(ascii_art).encode()}
 
-    except Exception as e:
-        await ctx.send(f"Error processing image: {str(e)}")
+def _animate_pipeline(image_input: BinaryIO, command: ParsedCommand) -> Tuple[bytes, Dict[str, bytes]]:
+    """Render the animation frames and encode them to an MP4 in memory."""
+    processor = AnimationProcessor(image_input)
+    try:
+        # Stream frames into the encoder as they are rendered
+        frames = processor.iter_frames(
+            effects=command.effects,
+            num_frames=command.animation_params.get('frames', 30)
+        )
+        video = processor.create_video_bytes(
+            frames=frames,
+            frame_rate=command.animation_params.get('fps', 24)
+        )
+    finally:
+        processor.cleanup()
+        
+    if not video:
+        raise RuntimeError("Failed to create animation")
+    return video, {}
 
-@bot.command(name='remix')
-async def remix_command(ctx, image_id: int, *args):
-    """Remix an existing processed image."""
+PIPELINES: Dict[str, Pipeline] = {
+    'image': Pipeline(_image_pipeline, "processed.png", "Processed", "Image",
+                      "Error processing image", dedup=True),
+    'remix': Pipeline(_image_pipeline, "remixed.png", "Remixed", "Remixed image",
+                      "Error remixing image", tags=('remixed',), dedup=True),
+    'animate': Pipeline(_animate_pipeline, "animation.mp4", "Animation", "Animation",
+                        "Error creating animation", tags=('animation',),
+                        status="Generating animation..."),
+    'ascii': Pipeline(_ascii_pipeline, "ascii.png", "ASCII", "ASCII art",
+                      "Error creating ASCII art", tags=('ascii',),
+                      parameters=lambda command: command.ascii_params),
+}
+
+async def _dispatch(ctx, kind: str, args: Tuple[str, ...], image_id: Optional[int] = None) -> None:
+    """
+    Run a processing command end to end: input, render, store and send.
+    
+    Args:
+        ctx: Command context
+        kind: Key into PIPELINES
+        args: Raw command arguments
+        image_id: Repository image to remix instead of resolving an input
+    """
+    pipeline = PIPELINES[kind]
     try:
-        # Get original image
-        image_data = repository.get_image(image_id)
-        if not image_data:
-            await ctx.send(f"Image with ID {image_id} not found")
-            return
+        command = command_parser.parse_command(f"{kind} {' '.join(args)}")
+        run_command = command
+        
+        # Get input image
+        if image_id is not None:
+            image_data = repository.get_image(image_id)
+            if not image_data:
+                await ctx.send(f"Image with ID {image_id} not found")
+                return
+            image_input = BytesIO(image_data['image'])
+            source = f"remixed from ID: {image_id}"
             
-        # Parse additional effects
-        command = command_parser.parse_command(' '.join(args))
+            # Apply original effects first, then the new ones
+            run_command = replace(
+                command,
+                effects=list(image_data.get('parameters', {}).items()) + command.effects
+            )
+        else:
+            try:
+                image_input, source = await get_input_image(ctx, repository, command)
+            except ValueError as e:
+                await ctx.send(str(e))
+                return
         
-        # Process image
-        processor = EffectProcessor(image_data['image'])
+        # Serve a previously stored identical result without re-rendering;
+        # random effects must be drawn afresh on every run
+        content_key = None
+        if pipeline.dedup and not any(name in RANDOM_EFFECTS for name, _ in run_command.effects):
+            content_key = _content_key(image_input.getvalue(), [kind, run_command.effects])
+            # Only the path is needed: discord.py streams the file from disk
+            cached = await asyncio.to_thread(
+                repository.get_by_content_hash, content_key, load_image=False
+            )
+            if cached:
+                if command.tags:
+                    await asyncio.to_thread(
+                        repository.add_tags, cached['id'], command.tags + list(pipeline.tags)
+                    )
+                await ctx.send(
+                    content=f"{pipeline.label} stored with ID: {cached['id']}",
+                    file=discord.File(str(cached['file_path']), filename=pipeline.filename)
+                )
+                return
         
-        # Apply original effects first
-        if 'parameters' in image_data:
-            for effect_name, params in image_data['parameters'].items():
-                processor.apply_effect(effect_name, params)
-                
-        # Apply new effects
-        for effect_name, params in command.effects:
-            processor.apply_effect(effect_name, params)
-            
-        # Handle output
-        output = processor.get_current_image()
-        output_bytes = BytesIO()
-        output.save(output_bytes, format='PNG')
-        output_bytes.seek(0)
+        status_msg = await ctx.send(pipeline.status) if pipeline.status else None
+        # Render off the event loop
+        output, extra_files = await _run_heavy(ctx, pipeline.runner, image_input, run_command)
         
+        # Store in repository if tagged, under the extension of the
+        # encoded output (animations are MP4, not PNG)
+        content = None
         if command.tags:
-            new_id = repository.store_image(
-                image=output_bytes.getvalue(),
-                title=f"Remixed_{ctx.author.name}",
+            stored_id = await asyncio.to_thread(
+                repository.store_image,
+                image=output,
+                title=f"{pipeline.title}_{ctx.author.name}",
                 creator_id=str(ctx.author.id),
                 creator_name=ctx.author.name,
-                tags=command.tags + ['remixed'],
-                parameters=dict(command.effects),
-                source_image=f"remixed from ID: {image_id}"
+                tags=command.tags + list(pipeline.tags),
+                parameters=pipeline.parameters(command),
+                source_image=source,
+                content_hash=content_key,
+                suffix=Path(pipeline.filename).suffix
             )
-            await ctx.send(f"Remixed image stored with ID: {new_id}")
-            
-        output_bytes.seek(0)
-        await ctx.send(file=discord.File(output_bytes, filename="remixed.png"))
+            content = f"{pipeline.label} stored with ID: {stored_id}"
+        
+        # Send the stored ID and every attachment in a single message
+        files = [discord.File(BytesIO(output), filename=pipeline.filename)]
+        files.extend(discord.File(BytesIO(data), filename=filename)
+                     for filename, data in extra_files.items())
+        await ctx.send(content=content, files=files)
         
+        if status_msg:
+            await status_msg.delete()
+            
     except Exception as e:
-        await ctx.send(f"Error remixing image: {str(e)}")
+        await ctx.send(f"{pipeline.error}: {str(e)}")
+
+@bot.command(name='image')
+async def image_command(ctx, *args):
+    """Process an image with effects."""
+    await _dispatch(ctx, 'image', args)
+
+@bot.command(name='remix')
+async def remix_command(ctx, image_id: int, *args):
+    """Remix an existing processed image."""
+    await _dispatch(ctx, 'remix', args, image_id=image_id)
 
 @bot.command(name='animate')
 async def animate_command(ctx, *args):
     """Create an animation with effects."""
-    try:
-        # Parse command
-        command = command_parser.parse_command(f"animate {' '.join(args)}")
-        
-        # Get input image
-        try:
-            image_bytes, source = await get_input_image(ctx, repository, command)
-        except ValueError as e:
-            await ctx.send(str(e))
-            return
-
-        # Create animation
-        processor = AnimationProcessor(image_bytes)
-        try:
-            status_msg = await ctx.send("Generating animation...")
-            
-            frames = processor.generate_frames(
-                effects=command.effects,
-                num_frames=command.animation_params.get('frames', 30)
-            )
-            
-            video_path = processor.create_video(
-                frame_paths=frames,
-                frame_rate=command.animation_params.get('fps', 24)
-            )
-            
-            if video_path and video_path.exists():
-                await ctx.send(file=discord.File(str(video_path)))
-                if command.tags:
-                    with open(video_path, 'rb') as f:
-                        video_id = repository.store_image(
-                            image=f.read(),
-                            title=f"Animation_{ctx.author.name}",
-                            creator_id=str(ctx.author.id),
-                            creator_name=ctx.author.name,
-                            tags=command.tags + ['animation'],
-                            parameters=dict(command.effects),
-                            source_image=source
-                        )
-                    await ctx.send(f"Animation stored with ID: {video_id}")
-            else:
-                await ctx.send("Failed to create animation")
-            
-            await status_msg.delete()
-            
-        finally:
-            processor.cleanup()
-
-    except Exception as e:
-        await ctx.send(f"Error creating animation: {str(e)}")
+    await _dispatch(ctx, 'animate', args)
 
 @bot.command(name='ascii')
 async def ascii_command(ctx, *args):
     """Create ASCII art from an image."""
-    try:
-        # Parse command
-        command = command_parser.parse_command(f"ascii {' '.join(args)}")
-        
-        # Get input image
-        try:
-            image_bytes, source = await get_input_image(ctx, repository, command)
-        except ValueError as e:
-            await ctx.send(str(e))
-            return
-
-        # Generate ASCII art
-        processor = ASCIIProcessor()
-        image = Image.open(BytesIO(image_bytes))
-        ascii_art = processor.convert_to_ascii(
-            image,
-            cols=command.ascii_params.get('cols', 80),
-            scale=command.ascii_params.get('scale', 0.43),
-            detailed=True
-        )
-        
-        # Create and save both text and image versions
-        ascii_image = processor.create_frame_image(ascii_art)
-        output_bytes = BytesIO()
-        ascii_image.save(output_bytes, format='PNG')
-        output_bytes.seek(0)
-        
-        # Store results if tagged
-        if command.tags:
-            image_id = repository.store_image(
-                image=output_bytes.getvalue(),
-                title=f"ASCII_{ctx.author.name}",
-                creator_id=str(ctx.author.id),
-                creator_name=ctx.author.name,
-                tags=command.tags + ['ascii'],
-                parameters=command.ascii_params,
-                source_image=source
-            )
-            await ctx.send(f"ASCII art stored with ID: {image_id}")
-
-        # Send results
-        output_bytes.seek(0)
-        await ctx.send(file=discord.File(output_bytes, filename="ascii.png"))
-        await ctx.send(file=discord.File('\n'.join(ascii_art).encode(), filename="ascii.txt"))
-
-    except Exception as e:
-        await ctx.send(f"Error creating ASCII art: {str(e)}")
+    await _dispatch(ctx, 'ascii', args)
 
 @bot.command(name='help')
 async def help_command(ctx):
@@ -338,9 +409,15 @@ def main():
     Path("image_storage").mkdir(exist_ok=True)
     Path("images").mkdir(exist_ok=True)  # For random image selection
 
-    # Windows-specific event loop policy
+    # Windows-specific event loop policy; elsewhere prefer uvloop when installed
     if sys.platform.startswith('win'):
         asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+    else:
+        try:
+            import uvloop
+            asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+        except ImportError:
+            pass
 
     print("Starting image processing bot...")
     bot.run(DISCORD_TOKEN)
@@ -1,9 +1,47 @@
-from typing import Dict, Any, List, Union, Optional
+from typing import Dict, Any, List, Union, Optional, Tuple
 from pathlib import Path
 import json
+import functools
 import logging
+import os
+import pickle
+import tempfile
 from dataclasses import dataclass
-import yaml
+
+@functools.lru_cache(maxsize=None)
+def _yaml_backend() -> Tuple[Any, type, type]:
+    """
+    Import PyYAML on first use and build the loader/dumper pair.
+    
+    Prefers the LibYAML-backed C implementations when PyYAML was built with
+    them. The loader and dumper understand the tuple tag used for parameter
+    ranges, and parameter types in effect_params are saved by name.
+    
+    Returns:
+        Tuple of (yaml module, loader class, dumper class)
+    """
+    import yaml
+    try:
+        from yaml import CSafeLoader as BaseLoader, CSafeDumper as BaseDumper
+    except ImportError:
+        from yaml import SafeLoader as BaseLoader, SafeDumper as BaseDumper
+        
+    class Loader(BaseLoader):
+        pass
+        
+    class Dumper(BaseDumper):
+        pass
+        
+    Loader.add_constructor(
+        'tag:yaml.org,2002:python/tuple',
+        lambda loader, node: tuple(loader.construct_sequence(node))
+    )
+    Dumper.add_representer(
+        tuple,
+        lambda dumper, data: dumper.represent_sequence('tag:yaml.org,2002:python/tuple', data)
+    )
+    Dumper.add_multi_representer(type, lambda dumper, data: dumper.represent_str(data.__name__))
+    return yaml, Loader, Dumper
 
 @dataclass
 class AnimationConfig:
@@ -33,7 +71,7 @@ class ProcessingConfig:
     """Configuration settings for image processing."""
     max_image_size: int = 4096
     jpeg_quality: int = 85
-    png_compression: int = 6
+    png_compression: int = 1  # zlib level; outputs are transient Discord uploads
     default_format: str = 'PNG'
 
 class ConfigManager:
@@ -52,6 +90,10 @@ class ConfigManager:
         self.config_dir = Path(config_dir)
         self.config_dir.mkdir(parents=True, exist_ok=True)
         
+        # Bumped whenever load_config replaces the settings, so caches built
+        # from them can tell they are stale
+        self.config_version = 0
+        
         # Initialize configuration objects
         self.animation = AnimationConfig()
         self.ascii = ASCIIConfig()
@@ -110,8 +152,17 @@ class ConfigManager:
             }
         }
         
-        # Load presets
-        self.presets = self._load_presets()
+        self._build_param_bounds()
+        
+        # Presets are parsed on first access
+        self._presets: Optional[Dict[str, Dict[str, Any]]] = None
+        
+    @property
+    def presets(self) -> Dict[str, Dict[str, Any]]:
+        """Effect presets, loaded from presets.yml on first access."""
+        if self._presets is None:
+            self._presets = self._load_presets()
+        return self._presets
         
     def _load_presets(self) -> Dict[str, Dict[str, Any]]:
         """
@@ -123,6 +174,7 @@ class ConfigManager:
         preset_path = self.config_dir / "presets.yml"
         
         if not preset_path.exists():
+            yaml, _, dumper = _yaml_backend()
             # Create default presets if file doesn't exist
             default_presets = {
                 'cyberpunk': {
@@ -150,17 +202,70 @@ class ConfigManager:
             
             # Save default presets
             with open(preset_path, 'w') as f:
-                yaml.dump(default_presets, f)
+                yaml.dump(default_presets, f, Dumper=dumper)
             
             return default_presets
         
+        # Reuse the parsed presets cached beside the YAML while it is unchanged
+        st = preset_path.stat()
+        fingerprint = {'mtime_ns': st.st_mtime_ns, 'size': st.st_size}
+        cached = self._read_preset_cache(fingerprint)
+        if cached is not None:
+            return cached
+        
         # Load existing presets
         try:
+            yaml, loader, _ = _yaml_backend()
             with open(preset_path) as f:
-                return yaml.safe_load(f)
+                presets = yaml.load(f, Loader=loader)
         except Exception as e:
             self.logger.error(f"Error loading presets: {e}")
             return {}
+            
+        self._write_preset_cache(fingerprint, presets)
+        return presets
+
+    def _read_preset_cache(self, fingerprint: Dict[str, int]) -> Optional[Dict[str, Dict[str, Any]]]:
+        """
+        Read pickled presets if they were written for the current presets.yml.
+        
+        Args:
+            fingerprint: mtime/size of presets.yml
+            
+        Returns:
+            Cached presets, or None if the cache is missing or stale
+        """
+        cache_path = self.config_dir / "presets.pkl"
+        try:
+            with open(cache_path, 'rb') as f:
+                if json.loads(f.readline()) != fingerprint:
+                    return None
+                return pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            self.logger.warning(f"Ignoring unreadable preset cache: {e}")
+            return None
+
+    def _write_preset_cache(self, fingerprint: Dict[str, int], 
+                            presets: Dict[str, Dict[str, Any]]) -> None:
+        """
+        Atomically write parsed presets behind a JSON fingerprint header.
+        
+        Args:
+            fingerprint: mtime/size of presets.yml
+            presets: Parsed preset configurations
+        """
+        cache_path = self.config_dir / "presets.pkl"
+        try:
+            # mkstemp creates the file with 0o600 permissions
+            fd, tmp_path = tempfile.mkstemp(dir=self.config_dir, prefix='.presets.', suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(json.dumps(fingerprint).encode() + b'\n')
+                pickle.dump(presets, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, cache_path)
+        except Exception as e:
+            self.logger.warning(f"Could not write preset cache: {e}")
 
     def save_preset(self, name: str, params: Dict[str, Any], 
                    description: Optional[str] = None) -> None:
@@ -174,28 +279,7 @@ class ConfigManager:
         """
         # Validate parameters against effect constraints
         for effect, effect_params in params.items():
-            if effect not in self.effect_params:
-                raise ValueError(f"Unknown effect: {effect}")
-            
-            constraints = self.effect_params[effect]
-            for param, value in effect_params.items():
-                if param not in constraints:
-                    raise ValueError(f"Unknown parameter '{param}' for effect '{effect}'")
-                
-                param_range = constraints[param]
-                if isinstance(value, (tuple, list)):
-                    for v in value:
-                        if not (param_range['min'] <= v <= param_range['max']):
-                            raise ValueError(
-                                f"Value {v} for {effect}.{param} outside valid range "
-                                f"[{param_range['min']}, {param_range['max']}]"
-                            )
-                else:
-                    if not (param_range['min'] <= value <= param_range['max']):
-                        raise ValueError(
-                            f"Value {value} for {effect}.{param} outside valid range "
-                            f"[{param_range['min']}, {param_range['max']}]"
-                        )
+            self.validate_params(effect, effect_params)
         
         # Add preset
         self.presets[name] = {
@@ -203,10 +287,12 @@ class ConfigManager:
             'description': description or f"Custom preset: {name}"
         }
         
-        # Save to file
+        # Save to file, dropping the now-stale parsed cache first
+        yaml, _, dumper = _yaml_backend()
+        (self.config_dir / "presets.pkl").unlink(missing_ok=True)
         preset_path = self.config_dir / "presets.yml"
         with open(preset_path, 'w') as f:
-            yaml.dump(self.presets, f)
+            yaml.dump(self.presets, f, Dumper=dumper)
 
     def get_preset(self, name: str) -> Dict[str, Any]:
         """
@@ -239,25 +325,46 @@ class ConfigManager:
         if effect not in self.effect_params:
             raise ValueError(f"Unknown effect: {effect}")
             
-        constraints = self.effect_params[effect]
         for param, value in params.items():
-            if param not in constraints:
-                raise ValueError(f"Unknown parameter '{param}' for effect '{effect}'")
-                
-            param_range = constraints[param]
-            if isinstance(value, (tuple, list)):
-                for v in value:
-                    if not (param_range['min'] <= v <= param_range['max']):
-                        raise ValueError(
-                            f"Value {v} for {effect}.{param} outside valid range "
-                            f"[{param_range['min']}, {param_range['max']}]"
-                        )
-            else:
-                if not (param_range['min'] <= value <= param_range['max']):
-                    raise ValueError(
-                        f"Value {value} for {effect}.{param} outside valid range "
-                        f"[{param_range['min']}, {param_range['max']}]"
-                    )
+            for v in (value if isinstance(value, (tuple, list)) else (value,)):
+                self.validate_value(effect, param, v)
+
+    def validate_value(self, effect: str, param: str, value: float) -> None:
+        """
+        Validate a single scalar parameter value.
+        
+        Fast path for callers that already know whether they hold a scalar
+        or a range: two comparisons against the stored bounds, without the
+        per-value type checks of validate_params.
+        
+        Args:
+            effect: Effect name
+            param: Parameter name
+            value: Scalar value, or one endpoint of a range
+            
+        Raises:
+            ValueError: If the parameter is unknown or the value out of range
+        """
+        bounds = self._param_bounds.get((effect, param))
+        if bounds is None:
+            if effect not in self.effect_params:
+                raise ValueError(f"Unknown effect: {effect}")
+            raise ValueError(f"Unknown parameter '{param}' for effect '{effect}'")
+            
+        lo, hi = bounds
+        if not (lo <= value <= hi):
+            raise ValueError(
+                f"Value {value} for {effect}.{param} outside valid range [{lo}, {hi}]"
+            )
+
+    def _build_param_bounds(self) -> None:
+        """Flatten effect_params ranges into one (min, max) lookup per parameter."""
+        self._param_bounds: Dict[Tuple[str, str], Tuple[Any, Any]] = {
+            (effect, param): (param_range['min'], param_range['max'])
+            for effect, constraints in self.effect_params.items()
+            for param, param_range in constraints.items()
+            if isinstance(param_range, dict) and 'min' in param_range
+        }
 
     def get_default_params(self, effect: str) -> Dict[str, Any]:
         """
@@ -283,6 +390,7 @@ class ConfigManager:
 
     def save_config(self) -> None:
         """Save current configuration to files."""
+        yaml, _, dumper = _yaml_backend()
         config_path = self.config_dir / "config.yml"
         
         config = {
@@ -294,7 +402,7 @@ class ConfigManager:
         }
         
         with open(config_path, 'w') as f:
-            yaml.dump(config, f)
+            yaml.dump(config, f, Dumper=dumper)
 
     def load_config(self) -> None:
         """Load configuration from files."""
@@ -302,8 +410,9 @@ class ConfigManager:
         
         if config_path.exists():
             try:
+                yaml, loader, _ = _yaml_backend()
                 with open(config_path) as f:
-                    config = yaml.safe_load(f)
+                    config = yaml.load(f, Loader=loader)
                     
                 # Update configuration objects
                 for key, value in config.get('animation', {}).items():
@@ -315,6 +424,8 @@ class ConfigManager:
                     
                 self.effect_order = config.get('effect_order', self.effect_order)
                 self.effect_params = config.get('effect_params', self.effect_params)
+                self._build_param_bounds()
+                self.config_version += 1
                 
             except Exception as e:
                 self.logger.error(f"Error loading configuration: {e}")
\ No newline at end of file
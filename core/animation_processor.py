@@ -1,11 +1,16 @@
 from PIL import Image
 import numpy as np
 import subprocess
+import threading
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+from multiprocessing import shared_memory
+from itertools import chain, repeat
 import tempfile
 import shutil
 import logging
 from pathlib import Path
-from typing import Dict, Any, Optional, Tuple, List, Union
+from typing import Dict, Any, Optional, Tuple, List, Union, BinaryIO, Iterable, Iterator
 from io import BytesIO
 import os
 
@@ -13,12 +18,154 @@ from .image_processor import BaseImageProcessor
 from .effect_processor import EffectProcessor
 from .utils import ImageUtils
 
+# Worker pool shared by all animations; created on first use
+_executor: Optional[ProcessPoolExecutor] = None
+
+def get_frame_executor() -> ProcessPoolExecutor:
+    """
+    Return the shared frame-rendering process pool.
+    
+    Used by AnimationProcessor and by other frame generators, such as the
+    channel pass in effects.animation_effects, so all share one pool.
+    
+    Workers are started with forkserver (spawn where that is unavailable)
+    rather than forked, so they do not copy the bot's threads, locks or
+    global random state.
+    """
+    global _executor
+    if _executor is None:
+        method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+        _executor = ProcessPoolExecutor(
+            max_workers=os.cpu_count(),
+            mp_context=multiprocessing.get_context(method)
+        )
+    return _executor
+
+# Effect with its parameters split into constants and the names of the
+# animated ones, whose bounds live in the shared start/end arrays
+PreparedEffect = Tuple[str, Dict[str, Any], List[str]]
+
+def _prepare_effects(effects: List[Tuple[str, Dict[str, Any]]]
+                     ) -> Tuple[List[PreparedEffect], np.ndarray, np.ndarray]:
+    """
+    Classify effect parameters once per animation rather than once per frame.
+    
+    The (start, end) bounds of every animated parameter, across all
+    effects, are flattened into two float arrays so a frame's values come
+    from one vectorized interpolation.
+    
+    Args:
+        effects: List of (effect_name, parameters) tuples
+        
+    Returns:
+        (prepared effects, range starts, range ends), with the animated
+        parameters' bounds in the order they appear in the effects
+    """
+    prepared = []
+    starts = []
+    ends = []
+    for effect_name, params in effects:
+        static = {}
+        animated = []
+        for param_name, param_value in params.items():
+            if isinstance(param_value, tuple) and len(param_value) == 2:
+                animated.append(param_name)
+                starts.append(param_value[0])
+                ends.append(param_value[1])
+            else:
+                static[param_name] = param_value
+        prepared.append((effect_name, static, animated))
+    return (prepared,
+            np.asarray(starts, dtype=np.float64),
+            np.asarray(ends, dtype=np.float64))
+
+def _bake_parameters(starts: np.ndarray, ends: np.ndarray, num_frames: int) -> List[List[float]]:
+    """
+    Interpolate every animated parameter for every frame up front.
+    
+    Args:
+        starts: Range starts from _prepare_effects
+        ends: Range ends from _prepare_effects
+        num_frames: Total number of frames in the animation
+        
+    Returns:
+        One row of parameter values per frame
+    """
+    progress = np.arange(num_frames) / max(num_frames - 1, 1)
+    return (starts + (ends - starts) * progress[:, None]).tolist()
+
+# Base image as (mode, size, name of the shared memory block holding its
+# raw pixels); small enough to send with every task
+SharedBase = Tuple[str, Tuple[int, int], str]
+
+def load_shared_base(base: SharedBase) -> Image.Image:
+    """Copy the base image out of its shared memory block."""
+    mode, size, name = base
+    # Pool workers report to the creating process's resource tracker, where
+    # the block is already registered, so attaching adds no extra cleanup
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        return Image.frombytes(mode, size, shm.buf)
+    finally:
+        shm.close()
+
+# Per-process processor for the last base image rendered, keyed by the
+# shared memory block it was loaded from
+_frame_processor: Optional[Tuple[str, EffectProcessor]] = None
+
+def _get_frame_processor(base: SharedBase) -> EffectProcessor:
+    """Return a processor reset to the base image, reusing the last one if possible."""
+    global _frame_processor
+    if _frame_processor is None or _frame_processor[0] != base[2]:
+        _frame_processor = (
+            base[2], EffectProcessor(load_shared_base(base), history_enabled=False)
+        )
+    else:
+        _frame_processor[1].reset()
+    return _frame_processor[1]
+
+def _render_frame(base: SharedBase,
+                  effects: List[PreparedEffect],
+                  frame_values: List[float],
+                  seed: np.random.SeedSequence) -> np.ndarray:
+    """
+    Render a single animation frame in a worker process.
+    
+    Args:
+        base: Base image reference from AnimationProcessor._shared_base
+        effects: Effects as returned by _prepare_effects
+        frame_values: This frame's row from _bake_parameters
+        seed: This frame's seed for random effects
+        
+    Returns:
+        RGBA frame as a (height, width, 4) uint8 array
+    """
+    values = iter(frame_values)
+    processor = _get_frame_processor(base)
+    processor.seed(seed)
+    
+    # Apply effects in sequence with proper parameter interpolation
+    for effect_name, static, animated in effects:
+        frame_params = dict(static)
+        for param_name in animated:
+            frame_params[param_name] = next(values)
+        
+        try:
+            processor.apply_effect(effect_name, frame_params)
+        except Exception as e:
+            logging.getLogger('AnimationProcessor').warning(
+                f"Error applying effect {effect_name}: {str(e)}"
+            )
+            continue
+    
+    return np.asarray(processor.current_image.convert('RGBA'))
+
 class AnimationProcessor:
     """
     Handles creation and management of image effect animations with improved multi-effect support.
     """
     
-    def __init__(self, image_input: Union[str, bytes, Image.Image, BytesIO]):
+    def __init__(self, image_input: Union[str, bytes, Image.Image, BytesIO, BinaryIO]):
         """Initialize animation processor with enhanced effect handling."""
         logging.basicConfig(level=logging.INFO)
         self.logger = logging.getLogger('AnimationProcessor')
@@ -31,97 +178,146 @@ class AnimationProcessor:
         new_width, new_height = ImageUtils.ensure_size_even(width, height)
         
         if (new_width, new_height) != (width, height):
-            new_image = Image.new('RGBA', (new_width, new_height), (0, 0, 0, 0))
-            new_image.paste(self.base_image, ((new_width - width) // 2, 
-                                            (new_height - height) // 2))
-            self.base_image = new_image
+            # Sizes only grow by one pixel, so a centred paste would land at
+            # (0, 0); cropping past the edge pads the same transparent strip
+            # without allocating and filling a separate canvas
+            self.base_image = ImageUtils.ensure_rgba(self.base_image).crop(
+                (0, 0, new_width, new_height)
+            )
+        
+        # Shared memory copy of base_image's raw pixels read by the frame
+        # workers, with the image it was taken from; rebuilt only if
+        # base_image is replaced
+        self._base_shm: Optional[Tuple[Image.Image, shared_memory.SharedMemory, SharedBase]] = None
         
-        # Set up temporary directory for frames
+        # Set up temporary directory for the encoded video
         self.temp_dir = Path(tempfile.mkdtemp(prefix='anim_frames_'))
-        self.frames_dir = self.temp_dir / "frames"
-        self.frames_dir.mkdir(exist_ok=True)
         
-    def _validate_effects(self, effects: List[Tuple[str, Dict[str, Any]]]) -> None:
-        """Validate effect parameters before processing."""
+    def _validate_effects(self, effects: List[Tuple[str, Dict[str, Any]]]) -> List[Tuple[str, Dict[str, Any]]]:
+        """
+        Validate effect parameters before processing.
+        
+        Returns:
+            Effects with intensities normalized from percentages; the input
+            list and its parameter dicts are left untouched, so parsed
+            commands can be shared between requests
+        """
         valid_effects = {
             'glitch', 'chroma', 'scan', 'noise', 'energy', 'pulse', 'consciousness'
         }
         
+        normalized = []
         for effect_name, params in effects:
             if effect_name not in valid_effects:
                 raise ValueError(f"Invalid effect: {effect_name}")
                 
             # Normalize intensity parameters
-            if 'intensity' in params:
-                intensity = params['intensity']
-                if isinstance(intensity, (int, float)):
-                    params['intensity'] = min(1.0, max(0.0, float(intensity) / 100))
-                elif isinstance(intensity, tuple):
-                    params['intensity'] = (
-                        min(1.0, max(0.0, float(intensity[0]) / 100)),
-                        min(1.0, max(0.0, float(intensity[1]) / 100))
-                    )
-
-    def _interpolate_parameters(self, params: Dict[str, Any], progress: float) -> Dict[str, Any]:
-        """Interpolate effect parameters for current frame."""
-        frame_params = {}
-        for param_name, param_value in params.items():
-            if isinstance(param_value, tuple) and len(param_value) == 2:
-                frame_params[param_name] = ImageUtils.interpolate_value(
-                    param_value[0], param_value[1], progress
-                )
-            else:
-                frame_params[param_name] = param_value
-        return frame_params
+            intensity = params.get('intensity')
+            if isinstance(intensity, (int, float)):
+                params = {**params, 'intensity': min(1.0, max(0.0, float(intensity) / 100))}
+            elif isinstance(intensity, tuple):
+                params = {**params, 'intensity': (
+                    min(1.0, max(0.0, float(intensity[0]) / 100)),
+                    min(1.0, max(0.0, float(intensity[1]) / 100))
+                )}
+            normalized.append((effect_name, params))
+        return normalized
 
-    def generate_frames(self, 
-                       effects: List[Tuple[str, Dict[str, Any]]], 
-                       num_frames: int = 30) -> List[Path]:
-        """Generate animation frames with improved multi-effect support."""
-        frame_paths = []
-        self._validate_effects(effects)
+    def _shared_base(self) -> SharedBase:
+        """
+        Publish base_image's raw pixels in shared memory, once per image.
+        
+        Workers attach to the block by name, so frame tasks carry only a
+        short reference instead of pickling the whole image each time.
+        """
+        if self._base_shm is None or self._base_shm[0] is not self.base_image:
+            self._release_shared_base()
+            
+            # Raw bytes carry no palette, so palette/exotic modes go as RGBA
+            base_image = self.base_image
+            if base_image.mode not in ('L', 'RGB', 'RGBA'):
+                base_image = base_image.convert('RGBA')
+            pixels = base_image.tobytes()
+            
+            shm = shared_memory.SharedMemory(create=True, size=len(pixels))
+            shm.buf[:len(pixels)] = pixels
+            self._base_shm = (
+                self.base_image, shm, (base_image.mode, base_image.size, shm.name)
+            )
+        return self._base_shm[2]
+
+    def _release_shared_base(self) -> None:
+        """Free the shared memory block of the base image, if any."""
+        if self._base_shm is not None:
+            shm = self._base_shm[1]
+            self._base_shm = None
+            shm.close()
+            shm.unlink()
+
+    def iter_frames(self, 
+                    effects: List[Tuple[str, Dict[str, Any]]], 
+                    num_frames: int = 30) -> Iterator[np.ndarray]:
+        """
+        Render animation frames in parallel, yielding each in order as it completes.
+        
+        Feeding this straight into create_video lets encoding overlap with
+        rendering instead of waiting for the whole frame list.
+        """
+        effects = self._validate_effects(effects)
         
         try:
-            for i in range(num_frames):
-                progress = i / (num_frames - 1)
-                
-                # Start with fresh copy of base image for each frame
-                frame = self.base_image.copy()
-                processor = EffectProcessor(frame)
-                
-                # Apply effects in sequence with proper parameter interpolation
-                for effect_name, params in effects:
-                    frame_params = self._interpolate_parameters(params, progress)
-                    
-                    try:
-                        processor.apply_effect(effect_name, frame_params)
-                    except Exception as e:
-                        self.logger.warning(f"Error applying effect {effect_name}: {str(e)}")
-                        continue
-                
-                # Save frame
-                frame_path = self.frames_dir / f"frame_{i:04d}.png"
-                processor.save(frame_path)
-                frame_paths.append(frame_path)
-                
+            # Workers read raw pixels from shared memory rather than an
+            # encoded image, so neither side pays for a codec or a pickle
+            base = self._shared_base()
+            
+            # Every frame's parameter values are computed here in one pass;
+            # workers only look up their row
+            prepared, starts, ends = _prepare_effects(effects)
+            rows = _bake_parameters(starts, ends, num_frames)
+            # Independent per-frame streams, so random effects differ between
+            # frames wherever they are rendered
+            seeds = np.random.SeedSequence().spawn(num_frames)
+            workers = os.cpu_count() or 1
+            if workers == 1 or num_frames == 1:
+                # Nothing to overlap; render in-process
+                results = map(_render_frame, repeat(base), repeat(prepared), rows, seeds)
+            else:
+                results = get_frame_executor().map(
+                    _render_frame,
+                    repeat(base),
+                    repeat(prepared),
+                    rows,
+                    seeds,
+                    chunksize=max(1, num_frames // (4 * workers))
+                )
+            
+            # map() yields in submission order, preserving frame ordering
+            for i, frame in enumerate(results):
                 self.logger.info(f"Generated frame {i + 1}/{num_frames}")
+                yield frame
                 
         except Exception as e:
             self.logger.error(f"Frame generation error: {str(e)}")
             raise
-            
-        return frame_paths
+
+    def generate_frames(self, 
+                       effects: List[Tuple[str, Dict[str, Any]]], 
+                       num_frames: int = 30) -> List[np.ndarray]:
+        """Generate animation frames in parallel across CPU cores."""
+        return list(self.iter_frames(effects, num_frames))
 
     def create_video(self, 
-                    frame_paths: List[Path],
+                    frames: Iterable[np.ndarray],
                     output_path: Optional[Union[str, Path]] = None,
                     frame_rate: int = 24,
                     crf: int = 23,
                     preset: str = 'medium') -> Optional[Path]:
-        """Create video with improved error handling and frame management."""
-        if not frame_paths:
-            raise ValueError("No frames provided for video creation")
-            
+        """
+        Create video by piping raw frames straight into ffmpeg.
+        
+        Frames may be any iterable, including the iter_frames generator;
+        each frame is written as soon as it is available.
+        """
         if not output_path:
             output_path = self.temp_dir / "output.mp4"
         else:
@@ -130,51 +326,134 @@ class AnimationProcessor:
         try:
             # Ensure output directory exists
             output_path.parent.mkdir(parents=True, exist_ok=True)
-            
-            # Verify all frames exist
-            for frame_path in frame_paths:
-                if not frame_path.exists():
-                    raise FileNotFoundError(f"Missing frame: {frame_path}")
-            
-            # Construct ffmpeg command
-            ffmpeg_cmd = [
-                'ffmpeg', '-y',
-                '-framerate', str(frame_rate),
-                '-i', str(self.frames_dir / 'frame_%04d.png'),
-                '-c:v', 'libx264',
-                '-pix_fmt', 'yuv420p',
-                '-crf', str(crf),
-                '-preset', preset,
-                '-movflags', '+faststart',
-                '-vf', 'format=yuv420p',
-                str(output_path)
-            ]
-            
-            # Run ffmpeg with proper error handling
-            try:
-                result = subprocess.run(
-                    ffmpeg_cmd,
-                    check=True,
-                    capture_output=True,
-                    text=True
-                )
-                
-                if result.returncode == 0:
-                    return output_path
-                    
-            except subprocess.CalledProcessError as e:
-                self.logger.error(f"ffmpeg error: {e.stderr}")
-                raise
+            self._encode_video(frames, ['-movflags', '+faststart', str(output_path)],
+                               frame_rate, crf, preset)
+            return output_path
                 
         except Exception as e:
             self.logger.error(f"Video creation error: {str(e)}")
             raise
+
+    def create_video_bytes(self,
+                           frames: Iterable[np.ndarray],
+                           frame_rate: int = 24,
+                           crf: int = 23,
+                           preset: str = 'medium') -> bytes:
+        """
+        Create video in memory, reading the encoded MP4 from ffmpeg's stdout.
+        
+        A fragmented MP4 is written since the muxer cannot seek back on a
+        pipe to place the index; this skips the file round trip for callers
+        that upload the bytes directly.
+        
+        Returns:
+            Encoded MP4 data
+        """
+        try:
+            return self._encode_video(
+                frames,
+                ['-f', 'mp4', '-movflags', 'frag_keyframe+empty_moov', 'pipe:1'],
+                frame_rate, crf, preset
+            )
+        except Exception as e:
+            self.logger.error(f"Video creation error: {str(e)}")
+            raise
+
+    def _encode_video(self,
+                      frames: Iterable[np.ndarray],
+                      output_args: List[str],
+                      frame_rate: int,
+                      crf: int,
+                      preset: str) -> bytes:
+        """
+        Feed RGBA frames to ffmpeg's stdin and wait for it to finish.
+        
+        Args:
+            frames: Iterable of equally sized RGBA frames
+            output_args: Trailing ffmpeg arguments naming the output
+            frame_rate: Frames per second
+            crf: x264 constant rate factor
+            preset: x264 preset
+            
+        Returns:
+            Whatever ffmpeg wrote to stdout
+        """
+        frames = iter(frames)
+        first_frame = next(frames, None)
+        if first_frame is None:
+            raise ValueError("No frames provided for video creation")
+            
+        height, width = first_frame.shape[:2]
+        
+        # Construct ffmpeg command reading raw RGBA frames from stdin
+        ffmpeg_cmd = [
+            'ffmpeg', '-y',
+            '-loglevel', 'error',
+            '-f', 'rawvideo',
+            '-pix_fmt', 'rgba',
+            '-s', f'{width}x{height}',
+            '-framerate', str(frame_rate),
+            '-i', '-',
+            '-c:v', 'libx264',
+            '-pix_fmt', 'yuv420p',
+            '-crf', str(crf),
+            '-preset', preset,
+            '-vf', 'format=yuv420p',
+            *output_args
+        ]
+        
+        process = subprocess.Popen(
+            ffmpeg_cmd,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE
+        )
+        
+        # Drain stdout/stderr concurrently so ffmpeg never blocks on a full
+        # pipe while we are still writing frames
+        output: Dict[str, bytes] = {}
+        
+        def drain(name: str, stream: BinaryIO) -> None:
+            output[name] = stream.read()
+            
+        readers = [
+            threading.Thread(target=drain, args=('stdout', process.stdout)),
+            threading.Thread(target=drain, args=('stderr', process.stderr))
+        ]
+        for reader in readers:
+            reader.start()
+        
+        try:
+            for frame in chain([first_frame], frames):
+                if frame.shape[:2] != (height, width):
+                    raise ValueError("All frames must share the same dimensions")
+                process.stdin.write(np.ascontiguousarray(frame).data)
+        except BrokenPipeError:
+            pass
+        except Exception:
+            # Don't leave a half-written video behind
+            process.kill()
+            process.wait()
+            raise
+        finally:
+            process.stdin.close()
+            for reader in readers:
+                reader.join()
+                
+        stderr = output.get('stderr', b'').decode(errors='replace')
+        if process.wait() != 0:
+            self.logger.error(f"ffmpeg error: {stderr}")
+            raise subprocess.CalledProcessError(
+                process.returncode, ffmpeg_cmd, stderr=stderr
+            )
             
-        return None
+        return output.get('stdout', b'')
 
     def cleanup(self):
         """Clean up temporary files with improved error handling."""
         try:
+            if getattr(self, '_base_shm', None) is not None:
+                self._release_shared_base()
             if self.temp_dir.exists():
                 shutil.rmtree(self.temp_dir)
         except Exception as e:
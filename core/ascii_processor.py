@@ -1,13 +1,70 @@
 import numpy as np
+import functools
 import io
 import math
 import os
 import sys
 from pathlib import Path
 from typing import List, Optional, Tuple, Dict, Any
-from PIL import Image, ImageEnhance, ImageDraw, ImageFont
+from PIL import Image, ImageDraw, ImageFont
 from .image_processor import BaseImageProcessor
 
+def _find_system_fonts() -> str:
+    """Find system fonts directory based on OS"""
+    if sys.platform == "win32":
+        return r"C:\Windows\Fonts"
+    elif sys.platform == "darwin":
+        return "/Library/Fonts"
+    else:
+        return "/usr/share/fonts"
+
+@functools.lru_cache(maxsize=16)
+def _find_monospace_font(size: int) -> ImageFont.FreeTypeFont:
+    """
+    Try to find and load a monospace font.
+    
+    Memoized per size so repeated processors and frames probe the font
+    paths only once.
+    """
+    fonts_dir = _find_system_fonts()
+    
+    font_files = {
+        'windows': [
+            os.path.join(fonts_dir, "consola.ttf"),
+            os.path.join(fonts_dir, "cour.ttf"),
+            os.path.join(fonts_dir, "lucon.ttf")
+        ],
+        'fallback': [
+            "/usr/share/fonts/truetype/dejavu/DejaVuSansMono.ttf",
+            "/usr/share/fonts/TTF/DejaVuSansMono.ttf",
+            "/Library/Fonts/Courier New.ttf"
+        ]
+    }
+    
+    for font_path in font_files['windows']:
+        try:
+            return ImageFont.truetype(font_path, size)
+        except:
+            continue
+    
+    for font_path in font_files['fallback']:
+        try:
+            return ImageFont.truetype(font_path, size)
+        except:
+            continue
+    
+    return ImageFont.load_default()
+
+@functools.lru_cache(maxsize=16)
+def _measure_char_size(font: ImageFont.FreeTypeFont) -> Tuple[int, int]:
+    """Measure the advance width and height of a character, memoized per font"""
+    img = Image.new('RGB', (100, 100))
+    draw = ImageDraw.Draw(img)
+    bbox = draw.textbbox((0, 0), 'M', font=font)
+    # Rows are drawn as whole strings, so columns are spaced by the
+    # font's advance rather than the glyph's ink width
+    return math.ceil(draw.textlength('M', font=font)), bbox[3] - bbox[1]
+
 class ASCIIProcessor:
     def __init__(self):
         self.basic_chars = list(' .:-=+*#%@')
@@ -15,84 +72,82 @@ class ASCIIProcessor:
         self.default_font_size = 14
         self.font = self._find_monospace_font(self.default_font_size)
         self.char_width, self.char_height = self._measure_char_size(self.font)
+        # (source image, (cols, scale), brightness grid) of the last conversion
+        self._grid_cache: Optional[Tuple[Image.Image, Tuple[int, float], np.ndarray]] = None
 
     def _find_system_fonts(self) -> str:
         """Find system fonts directory based on OS"""
-        if sys.platform == "win32":
-            return r"C:\Windows\Fonts"
-        elif sys.platform == "darwin":
-            return "/Library/Fonts"
-        else:
-            return "/usr/share/fonts"
+        return _find_system_fonts()
 
     def _find_monospace_font(self, size: int) -> ImageFont.FreeTypeFont:
         """Try to find and load a monospace font"""
-        fonts_dir = self._find_system_fonts()
-        
-        font_files = {
-            'windows': [
-                os.path.join(fonts_dir, "consola.ttf"),
-                os.path.join(fonts_dir, "cour.ttf"),
-                os.path.join(fonts_dir, "lucon.ttf")
-            ],
-            'fallback': [
-                "/usr/share/fonts/truetype/dejavu/DejaVuSansMono.ttf",
-                "/usr/share/fonts/TTF/DejaVuSansMono.ttf",
-                "/Library/Fonts/Courier New.ttf"
-            ]
-        }
-        
-        for font_path in font_files['windows']:
-            try:
-                return ImageFont.truetype(font_path, size)
-            except:
-                continue
-        
-        for font_path in font_files['fallback']:
-            try:
-                return ImageFont.truetype(font_path, size)
-            except:
-                continue
-        
-        return ImageFont.load_default()
+        return _find_monospace_font(size)
 
     def _measure_char_size(self, font: ImageFont.FreeTypeFont) -> Tuple[int, int]:
-        """Measure the exact width and height of a character"""
-        img = Image.new('RGB', (100, 100))
-        draw = ImageDraw.Draw(img)
-        bbox = draw.textbbox((0, 0), 'M', font=font)
-        return bbox[2] - bbox[0], bbox[3] - bbox[1]
+        """Measure the advance width and height of a character"""
+        return _measure_char_size(font)
 
-    def convert_to_ascii(self, image: Image.Image, cols: int = 120, 
-                        scale: float = 0.43, detailed: bool = True) -> List[str]:
-        """Convert image to ASCII art with improved quality"""
-        if image.mode not in ['L', 'RGB']:
-            image = image.convert('RGB')
-        
-        image = image.convert('L')
+    def _brightness_grid(self, image: Image.Image, cols: int, scale: float) -> np.ndarray:
+        """
+        Compute the per-character brightness grid for an image.
+        
+        The last grid is kept and returned again when the same image object
+        is converted with the same cols/scale, e.g. when re-rendering one
+        base image for several frames.
+        """
+        key = (cols, scale)
+        cached = self._grid_cache
+        if cached is not None and cached[0] is image and cached[1] == key:
+            return cached[2]
+            
+        source = image
+        # Convert straight to greyscale; going through RGB first gives the
+        # same levels for every mode Pillow converts directly, at the cost
+        # of an extra full-size image
+        if image.mode != 'L':
+            try:
+                image = image.convert('L')
+            except ValueError:
+                image = image.convert('RGB').convert('L')
         
         width, height = image.size
         w = width / cols
         h = w / scale
         rows = int(height / h)
         
-        if cols > width or rows > height:
+        if (cols, rows) == (width, height):
+            # One pixel per character; nothing to resample
+            brightness = np.asarray(image)
+        elif cols > width or rows > height:
             image = image.resize((cols, rows), Image.Resampling.LANCZOS)
+            brightness = np.asarray(image)
         else:
-            image = image.resize((cols, rows), Image.Resampling.NEAREST)
-        
+            # Average each character cell in one vectorized pass; cell edges
+            # are spread evenly so no border pixels are dropped
+            y_edges = np.arange(rows) * height // rows
+            x_edges = np.arange(cols) * width // cols
+            pixels = np.asarray(image)
+            sums = np.add.reduceat(pixels, y_edges, axis=0, dtype=np.uint32)
+            sums = np.add.reduceat(sums, x_edges, axis=1)
+            cell_h = np.diff(np.append(y_edges, height))
+            cell_w = np.diff(np.append(x_edges, width))
+            brightness = sums // np.outer(cell_h, cell_w)
+            
+        self._grid_cache = (source, key, brightness)
+        return brightness
+
+    def convert_to_ascii(self, image: Image.Image, cols: int = 120, 
+                        scale: float = 0.43, detailed: bool = True) -> List[str]:
+        """Convert image to ASCII art with improved quality"""
+        # Column counts parsed from commands arrive as floats
+        brightness = self._brightness_grid(image, int(cols), scale)
         chars = self.detailed_chars if detailed else self.basic_chars
         
-        pixels = np.array(image)
-        ascii_lines = []
-        for row in pixels:
-            ascii_line = ''
-            for pixel in row:
-                char_idx = int((pixel / 255) * (len(chars) - 1))
-                ascii_line += chars[char_idx]
-            ascii_lines.append(ascii_line)
-        
-        return ascii_lines
+        # Integer index math; rows of U1 characters are reinterpreted as one
+        # fixed-width string each instead of being joined in Python
+        char_idx = (brightness.astype(np.int32) * (len(chars) - 1)) // 255
+        grid = np.array(chars, dtype='<U1')[char_idx]
+        return grid.view(f'<U{grid.shape[1]}').ravel().tolist()
 
     def create_frame_image(self, ascii_lines: List[str], 
                           font_size: Optional[int] = None,
@@ -115,15 +170,26 @@ class ASCIIProcessor:
         image = Image.new('RGB', (int(width), int(height)), color=bg_color)
         draw = ImageDraw.Draw(image)
         
+        # One draw call per row when the font is monospaced; a proportional
+        # fallback font has to be placed glyph by glyph to keep columns aligned
+        monospace = draw.textlength('i', font=font) == draw.textlength('M', font=font)
         for y, line in enumerate(ascii_lines):
+            pos_y = padding + (y * char_height * line_spacing)
+            if monospace:
+                if line.strip():
+                    draw.text((padding, pos_y), line, fill=text_color, font=font)
+                continue
             for x, char in enumerate(line):
                 if char != ' ':
                     pos_x = padding + (x * char_width)
-                    pos_y = padding + (y * char_height * line_spacing)
                     draw.text((pos_x, pos_y), char, fill=text_color, font=font)
         
-        enhancer = ImageEnhance.Contrast(image)
-        image = enhancer.enhance(1.2)
+        # Contrast x1.2 about the mean grey level as one lookup table,
+        # with ImageEnhance.Contrast's single-precision blend and truncation
+        mean = np.float32(int(np.asarray(image.convert('L')).mean() + 0.5))
+        levels = np.arange(256, dtype=np.float32)
+        lut = np.clip(mean + np.float32(1.2) * (levels - mean), 0, 255).astype(np.uint8)
+        image = image.point(lut.tolist() * 3)
         
         width, height = image.size
         new_width = width if width % 2 == 0 else width + 1
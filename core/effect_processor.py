@@ -1,11 +1,186 @@
 # image_processing/core/effect_processor.py
 
-from PIL import Image, ImageDraw, ImageEnhance, ImageFilter
+from PIL import Image, ImageEnhance, ImageFilter
 import numpy as np
+import functools
 from typing import Dict, Any, Optional, Tuple, Union, List
 from .image_processor import BaseImageProcessor
+from .utils import ImageUtils
 import math
 
+try:
+    from numba import njit, prange
+except ImportError:  # Numba is optional; the NumPy kernels below work without it
+    njit = None
+
+if njit is not None:
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _energy_jit(arr, intensity, out):
+        """Fused sine displacement: one pass, no full-size temporaries."""
+        height, width = arr.shape[0], arr.shape[1]
+        for y in prange(height):
+            for x in range(width):
+                d = math.sin(0.1 * (x + y)) * intensity * 30
+                for c in range(3):
+                    v = arr[y, x, c] + d
+                    out[y, x, c] = 0 if v < 0 else 255 if v > 255 else np.uint8(v)
+
+def _glitch_kernel(arr: np.ndarray, intensity: float,
+                   rng: Optional[np.random.Generator] = None) -> None:
+    """
+    Shift random rows of an RGB array horizontally, in place.
+    
+    Rows and offsets come from rng rather than the global NumPy state,
+    which forked pool workers would all share.
+    """
+    height, width = arr.shape[:2]
+    
+    # Number of glitch lines based on intensity
+    num_lines = int(intensity * height * 0.1)  # Up to 10% of height
+    max_offset = int(intensity * 20)
+    if num_lines == 0 or max_offset == 0 or height < 2:
+        return
+    
+    # Random line positions and offsets
+    if rng is None:
+        rng = np.random.default_rng()
+    ys = rng.integers(0, height - 1, num_lines)
+    offsets = rng.integers(-max_offset, max_offset, num_lines)
+    
+    # Rolls of one row commute, so a row picked more than once ends up
+    # shifted by the sum of its offsets, as with one roll after another
+    shifts = np.zeros(height, dtype=np.int64)
+    np.add.at(shifts, ys, offsets)
+    rows = np.unique(ys)
+    
+    # Shift every selected line at once: column x of a line shifted by
+    # s reads from (x - s) mod width, as np.roll would
+    cols = (np.arange(width) - shifts[rows, None]) % width
+    arr[rows] = arr[rows[:, None], cols]
+
+def _noise_kernel(arr: np.ndarray, intensity: float, out: Optional[np.ndarray] = None,
+                  rng: Optional[np.random.Generator] = None) -> None:
+    """
+    Add Gaussian noise to an RGB array, in place or into out.
+    
+    Samples always come from rng, so a seeded generator gives the same
+    output whether or not Numba is installed.
+    """
+    if out is None:
+        out = arr
+        
+    # float32 samples are ample for uint8 output and halve the buffer; add
+    # and clip inside it, so it is the only full-size temporary
+    if rng is None:
+        rng = np.random.default_rng()
+    noise = rng.standard_normal(arr.shape, dtype=np.float32)
+    noise *= intensity * 50
+    noise += arr
+    np.clip(noise, 0, 255, out=noise)
+    out[...] = noise
+
+@functools.lru_cache(maxsize=8)
+def _sine_basis(height: int, width: int) -> np.ndarray:
+    """
+    Build the unscaled energy displacement pattern for an image size.
+    
+    Only the size is part of the key, so animation frames that interpolate
+    the intensity all reuse one map. The returned array is shared and
+    read-only.
+    """
+    # sin(a + b) = cos(a)sin(b) + sin(a)cos(b): height + width sines and
+    # cosines combined by two outer products, instead of a sine per pixel
+    rows = np.arange(height) * 0.1
+    cols = np.arange(width) * 0.1
+    basis = np.multiply.outer(np.cos(rows), np.sin(cols))
+    basis += np.multiply.outer(np.sin(rows), np.cos(cols))
+    basis.setflags(write=False)
+    return basis
+
+def _make_distortion(height: int, width: int, intensity: float) -> np.ndarray:
+    """
+    Scale the cached sine pattern into the energy displacement map.
+    
+    Values are floored to int16, which gives the same result as adding the
+    float map to integer pixels and truncating.
+    """
+    distortion = _sine_basis(height, width) * intensity
+    distortion *= 30
+    return np.floor(distortion, out=distortion).astype(np.int16)
+
+def _energy_kernel(arr: np.ndarray, intensity: float, out: Optional[np.ndarray] = None) -> None:
+    """Add a diagonal sine distortion to an RGB array, in place or into out."""
+    if out is None:
+        out = arr
+    if njit is not None:
+        _energy_jit(arr, float(intensity), out)
+        return
+        
+    distortion = _make_distortion(arr.shape[0], arr.shape[1], float(intensity))
+    
+    # Apply to all channels in one broadcast pass
+    shifted = arr.astype(np.int16)
+    shifted += distortion[:, :, None]
+    np.clip(shifted, 0, 255, out=shifted)
+    out[...] = shifted
+
+def _brightness_kernel(arr: np.ndarray, factor: float) -> None:
+    """
+    Scale an RGB array's brightness in place.
+    
+    Matches ImageEnhance.Brightness, which multiplies in single precision
+    and truncates.
+    """
+    scaled = arr.astype(np.float32)
+    scaled *= np.float32(factor)
+    np.clip(scaled, 0, 255, out=scaled)
+    arr[...] = scaled
+
+def _chroma_kernel(arr: np.ndarray, max_offset: int) -> None:
+    """
+    Offset the red channel left and the blue channel right, in place.
+    
+    Each shifted channel gets the same light blur offset_channel applies.
+    Both are blurred by one call on the whole array, with the untouched
+    green channel restored afterwards, rather than one blur per channel.
+    """
+    if max_offset == 0:
+        return
+    green = arr[..., 1].copy()
+    arr[..., 0] = np.roll(arr[..., 0], -max_offset, axis=1)
+    arr[..., 2] = np.roll(arr[..., 2], max_offset, axis=1)
+    arr[...] = ImageUtils.gaussian_blur(Image.fromarray(arr), 0.5)
+    arr[..., 1] = green
+
+def _chroma_offset_kernel(arr: np.ndarray, offset: float) -> None:
+    """Chromatic aberration of up to 10% of the width, in place."""
+    _chroma_kernel(arr, int(arr.shape[1] * offset * 0.1))
+
+@functools.lru_cache(maxsize=16)
+def _scanline_overlay(width: int, height: int, gap: int, alpha: int) -> Image.Image:
+    """
+    Build the RGBA scan line overlay, memoized so animation frames share it.
+    
+    Black rows every gap pixels are set with one strided store instead of a
+    draw call per line. The returned image is shared and must not be modified.
+    """
+    overlay = np.zeros((height, width, 4), dtype=np.uint8)
+    overlay[::gap, :, 3] = alpha
+    return Image.fromarray(overlay)
+
+# Effects that can run directly on a shared RGB uint8 buffer:
+# name -> (parameter name, default value, in-place kernel)
+ARRAY_EFFECTS = {
+    'glitch': ('intensity', 0.5, _glitch_kernel),
+    'chroma': ('offset', 0.5, _chroma_offset_kernel),
+    'noise': ('intensity', 0.5, _noise_kernel),
+    'energy': ('intensity', 0.5, _energy_kernel),
+}
+
+# Effects whose output depends on random draws, so repeating a command
+# gives a different image
+RANDOM_EFFECTS = frozenset({'glitch', 'noise'})
+
 class EffectProcessor(BaseImageProcessor):
     """
     Extends BaseImageProcessor with specific effect implementations.
@@ -22,24 +197,11 @@ class EffectProcessor(BaseImageProcessor):
             raise ValueError("Intensity must be between 0 and 1")
             
         self.ensure_rgb()
-        self.history.append(self.current_image.copy())
+        self._push_history()
         
-        # Convert to numpy array for efficient processing
+        # Glitch moves rows within the buffer, so it needs a writable copy
         arr = np.array(self.current_image)
-        height = arr.shape[0]
-        
-        # Number of glitch lines based on intensity
-        num_lines = int(intensity * height * 0.1)  # Up to 10% of height
-        
-        for _ in range(num_lines):
-            # Random line position and offset
-            y = np.random.randint(0, height-1)
-            offset = np.random.randint(-int(intensity * 20), int(intensity * 20))
-            
-            # Shift line horizontally
-            if 0 <= y < height:
-                arr[y, :] = np.roll(arr[y, :], offset, axis=0)
-        
+        _glitch_kernel(arr, intensity, self._rng)
         self.current_image = Image.fromarray(arr)
 
     def apply_chromatic_aberration(self, offset: float) -> None:
@@ -53,15 +215,18 @@ class EffectProcessor(BaseImageProcessor):
             raise ValueError("Offset must be between 0 and 1")
             
         self.ensure_rgb()
-        self.history.append(self.current_image.copy())
+        self._push_history()
         
         # Calculate pixel offsets based on image size
         width, _ = self.current_image.size
         max_offset = int(width * offset * 0.1)  # Up to 10% of width
         
-        # Offset red channel left, blue channel right
-        self.offset_channel('R', -max_offset)
-        self.offset_channel('B', max_offset)
+        if max_offset == 0:
+            return
+            
+        arr = np.array(self.current_image)
+        _chroma_kernel(arr, max_offset)
+        self.current_image = Image.fromarray(arr)
 
     def apply_scan_lines(self, gap: int, opacity: float = 0.5) -> None:
         """
@@ -76,17 +241,10 @@ class EffectProcessor(BaseImageProcessor):
         if not 0 <= opacity <= 1:
             raise ValueError("Opacity must be between 0 and 1")
             
-        self.history.append(self.current_image.copy())
+        self._push_history()
         width, height = self.current_image.size
         
-        # Create scan line overlay
-        overlay = Image.new('RGBA', (width, height), (0, 0, 0, 0))
-        draw = ImageDraw.Draw(overlay)
-        
-        # Draw horizontal lines
-        for y in range(0, height, gap):
-            alpha = int(opacity * 255)
-            draw.line([(0, y), (width, y)], fill=(0, 0, 0, alpha))
+        overlay = _scanline_overlay(width, height, gap, int(opacity * 255))
         
         # Composite with original
         self.ensure_rgba()
@@ -103,16 +261,13 @@ class EffectProcessor(BaseImageProcessor):
             raise ValueError("Intensity must be between 0 and 1")
             
         self.ensure_rgb()
-        self.history.append(self.current_image.copy())
-        
-        # Convert to numpy array
-        arr = np.array(self.current_image)
-        
-        # Generate noise
-        noise = np.random.normal(0, intensity * 50, arr.shape)
-        noisy = np.clip(arr + noise, 0, 255).astype(np.uint8)
+        self._push_history()
         
-        self.current_image = Image.fromarray(noisy)
+        # Read the pixels without a writable copy; results go to a new buffer
+        arr = np.asarray(self.current_image)
+        out = np.empty_like(arr)
+        _noise_kernel(arr, intensity, out, self._rng)
+        self.current_image = Image.fromarray(out)
 
     def apply_energy_effect(self, intensity: float) -> None:
         """
@@ -125,24 +280,13 @@ class EffectProcessor(BaseImageProcessor):
             raise ValueError("Intensity must be between 0 and 1")
             
         self.ensure_rgb()
-        self.history.append(self.current_image.copy())
-        
-        # Convert to numpy array
-        arr = np.array(self.current_image)
-        
-        # Create displacement map
-        x = np.arange(arr.shape[1])
-        y = np.arange(arr.shape[0])
-        X, Y = np.meshgrid(x, y)
-        
-        # Generate distortion pattern
-        distortion = np.sin(X * 0.1 + Y * 0.1) * intensity * 30
+        self._push_history()
         
-        # Apply to each channel
-        for c in range(3):
-            arr[:,:,c] = np.clip(arr[:,:,c] + distortion, 0, 255)
-        
-        self.current_image = Image.fromarray(arr.astype(np.uint8))
+        # Read the pixels without a writable copy; results go to a new buffer
+        arr = np.asarray(self.current_image)
+        out = np.empty_like(arr)
+        _energy_kernel(arr, intensity, out)
+        self.current_image = Image.fromarray(out)
 
     def apply_pulse_effect(self, intensity: float) -> None:
         """
@@ -154,7 +298,7 @@ class EffectProcessor(BaseImageProcessor):
         if not 0 <= intensity <= 1:
             raise ValueError("Intensity must be between 0 and 1")
         
-        self.history.append(self.current_image.copy())
+        self._push_history()
         enhancer = ImageEnhance.Brightness(self.current_image)
         pulse_factor = 1.0 + intensity
         self.current_image = enhancer.enhance(pulse_factor)
@@ -169,14 +313,19 @@ class EffectProcessor(BaseImageProcessor):
         if not 0 <= intensity <= 1:
             raise ValueError("Intensity must be between 0 and 1")
         
-        self.history.append(self.current_image.copy())
-        
-        # Apply multiple effects in sequence
-        self.apply_energy_effect(intensity * 0.5)
-        self.apply_pulse_effect(intensity * 0.3)
-        
-        if intensity > 0.5:
-            self.apply_chromatic_aberration(intensity * 0.4)
+        # Energy, pulse and chromatic aberration fused on one buffer,
+        # undone as one step
+        with self.atomic_op():
+            self.ensure_rgb()
+            arr = np.asarray(self.current_image)
+            out = np.empty_like(arr)
+            _energy_kernel(arr, intensity * 0.5, out)
+            _brightness_kernel(out, 1.0 + intensity * 0.3)
+            
+            if intensity > 0.5:
+                _chroma_kernel(out, int(out.shape[1] * (intensity * 0.4) * 0.1))
+                
+            self.current_image = Image.fromarray(out)
 
     def apply_effect(self, effect_name: str, params: Dict[str, Any]) -> None:
         """
@@ -214,6 +363,44 @@ class EffectProcessor(BaseImageProcessor):
         for effect_name, params in effects:
             self.apply_effect(effect_name, params)
 
+    def apply_effects_batch(self, effects: List[Tuple[str, Dict[str, Any]]]) -> None:
+        """
+        Apply a sequence of effects, keeping runs of array effects on one buffer.
+        
+        Consecutive effects listed in ARRAY_EFFECTS mutate a single NumPy
+        array in place, so the image is only converted between PIL and NumPy
+        at the boundaries of each run rather than around every effect.
+        
+        Args:
+            effects: List of (effect_name, parameters) tuples
+        """
+        arr = None
+        for effect_name, params in effects:
+            if effect_name in ARRAY_EFFECTS:
+                param_name, default, kernel = ARRAY_EFFECTS[effect_name]
+                value = params.get(param_name, default)
+                if not 0 <= value <= 1:
+                    raise ValueError(f"{param_name.capitalize()} must be between 0 and 1")
+                    
+                if arr is None:
+                    self.ensure_rgb()
+                    self._push_history()
+                    arr = np.array(self.current_image)
+                if kernel is _noise_kernel or kernel is _glitch_kernel:
+                    # Draw from the processor's generator, as the single
+                    # effect methods do
+                    kernel(arr, value, rng=self._rng)
+                else:
+                    kernel(arr, value)
+            else:
+                if arr is not None:
+                    self.current_image = Image.fromarray(arr)
+                    arr = None
+                self.apply_effect(effect_name, params)
+                
+        if arr is not None:
+            self.current_image = Image.fromarray(arr)
+
     def create_effect_animation(self, effect_name: str, 
                               params: Dict[str, Any],
                               num_frames: int = 30) -> List[Image.Image]:
@@ -230,22 +417,26 @@ class EffectProcessor(BaseImageProcessor):
         """
         frames = []
         
+        # One processor serves every frame; reset() restores a fresh copy of
+        # the original, so each frame's image can be kept without copying
+        frame_processor = EffectProcessor(self.original_image, history_enabled=False)
+        
+        # Interpolate every animated parameter for all frames at once
+        progress = np.arange(num_frames) / (num_frames - 1)
+        animated = {
+            param: (value[0] + (value[1] - value[0]) * progress).tolist()
+            for param, value in params.items()
+            if isinstance(value, tuple) and len(value) == 2
+        }
+        
         for i in range(num_frames):
-            # Calculate progress through animation
-            progress = i / (num_frames - 1)
-            
-            # Create frame parameters by interpolating between start/end values
-            frame_params = {}
-            for param, value in params.items():
-                if isinstance(value, tuple) and len(value) == 2:
-                    start, end = value
-                    frame_params[param] = start + (end - start) * progress
-                else:
-                    frame_params[param] = value
+            frame_params = dict(params)
+            for param, values in animated.items():
+                frame_params[param] = values[i]
             
             # Create frame
-            frame_processor = EffectProcessor(self.original_image)
+            frame_processor.reset()
             frame_processor.apply_effect(effect_name, frame_params)
-            frames.append(frame_processor.get_current_image())
+            frames.append(frame_processor.current_image)
         
         return frames
\ No newline at end of file
@@ -12,6 +12,16 @@ import logging
 from PIL import Image
 from io import BytesIO
 
+from .utils import ImageUtils
+
+# Single-frame formats decoded/encoded through ImageUtils' OpenCV fast
+# path; anything else (GIF, multi-frame TIFF, ...) goes straight to Pillow
+_FAST_LOAD_SUFFIXES = {'.png', '.jpg', '.jpeg', '.bmp'}
+_FAST_SAVE_FORMATS = {'PNG': ImageUtils.encode_png, 'JPEG': ImageUtils.encode_jpeg}
+
+# Buffer size for Pillow-encoded output, which arrives in many small writes
+_WRITE_BUFFER_SIZE = 1024 * 1024
+
 class FileManager:
     """Manages file operations for the image processing system."""
     
@@ -94,11 +104,26 @@ class FileManager:
         
         try:
             if isinstance(image, (bytes, BytesIO)):
-                if isinstance(image, bytes):
-                    image = BytesIO(image)
-                image = Image.open(image)
+                if isinstance(image, BytesIO):
+                    image = image.getvalue()
+                image = ImageUtils.decode_image(image)
                 
-            image.save(output_path, format=format)
+            suffix = output_path.suffix.lower()
+            target = (format or Image.registered_extensions().get(suffix, '')).upper()
+            encoder = _FAST_SAVE_FORMATS.get(target)
+            if encoder is not None:
+                output_path.write_bytes(encoder(image))
+            elif target:
+                try:
+                    with open(output_path, 'wb', buffering=_WRITE_BUFFER_SIZE) as f:
+                        image.save(f, format=target)
+                except Exception:
+                    # Don't leave a partial file behind, as Image.save doesn't
+                    output_path.unlink(missing_ok=True)
+                    raise
+            else:
+                # Let Pillow report the unknown extension
+                image.save(output_path, format=format)
             
         except Exception as e:
             self.logger.error(f"Error saving image: {e}")
@@ -119,11 +144,13 @@ class FileManager:
                 path = Path(path)
                 if not path.exists():
                     raise FileNotFoundError(f"Image not found: {path}")
+                if path.suffix.lower() in _FAST_LOAD_SUFFIXES:
+                    return ImageUtils.decode_image(path.read_bytes())
                 return Image.open(path)
             elif isinstance(path, bytes):
-                return Image.open(BytesIO(path))
+                return ImageUtils.decode_image(path)
             elif isinstance(path, BytesIO):
-                return Image.open(path)
+                return ImageUtils.decode_image(path.getvalue())
             else:
                 raise ValueError(f"Unsupported image source type: {type(path)}")
                 
@@ -2,23 +2,25 @@ from PIL import (
     Image, 
     ImageEnhance, 
     ImageDraw, 
-    ImageFilter, 
-    ImageStat,
     ImageChops
 )
 import numpy as np
-from typing import Dict, Any, Optional, Tuple, List, Union
+from typing import Dict, Any, Optional, Tuple, Union, BinaryIO, Deque, Iterator
+from collections import deque
+from contextlib import contextmanager
 from pathlib import Path
-import colorsys
 import math
 from io import BytesIO
 
+from .utils import ImageUtils
+
 class BaseImageProcessor:
     """
     Core image processing functionality that handles basic image operations
     and provides a foundation for more complex effects.
     """
-    def __init__(self, image_input: Union[str, bytes, Image.Image, BytesIO]):
+    def __init__(self, image_input: Union[str, bytes, Image.Image, BytesIO, BinaryIO],
+                 history_enabled: bool = True, max_history: int = 8):
         """
         Initialize the image processor with flexible input handling.
         
@@ -27,13 +29,20 @@ class BaseImageProcessor:
                 - str: Path to image file
                 - bytes: Raw image data
                 - Image.Image: PIL Image object
-                - BytesIO: BytesIO containing image data
+                - BytesIO/BinaryIO: Readable binary stream containing image data
+            history_enabled: Keep copies of previous states for undo; disable
+                for one-shot pipelines that never undo
+            max_history: Number of undo steps kept, oldest dropped first
         """
         self.original_image = self._load_image(image_input)
         self.current_image = self.original_image.copy()
-        self.history: List[Image.Image] = []
+        self.history_enabled = history_enabled
+        self.history: Deque[Image.Image] = deque(maxlen=max_history)
+        self._atomic_depth = 0
+        # Per-processor generator, freshly seeded so forked workers differ
+        self._rng = np.random.default_rng()
         
-    def _load_image(self, image_input: Union[str, bytes, Image.Image, BytesIO]) -> Image.Image:
+    def _load_image(self, image_input: Union[str, bytes, Image.Image, BytesIO, BinaryIO]) -> Image.Image:
         """
         Load image from various input types.
         """
@@ -43,14 +52,35 @@ class BaseImageProcessor:
                 raise ValueError(f"Input image not found: {image_input}")
             return Image.open(path)
         elif isinstance(image_input, bytes):
-            return Image.open(BytesIO(image_input))
+            return ImageUtils.decode_image(image_input)
         elif isinstance(image_input, Image.Image):
             return image_input
-        elif isinstance(image_input, BytesIO):
-            return Image.open(image_input)
+        elif hasattr(image_input, 'read'):
+            return ImageUtils.decode_image(image_input.read())
         else:
             raise ValueError(f"Unsupported image input type: {type(image_input)}")
 
+    def _push_history(self) -> None:
+        """Save a copy of the current image for undo, if history is enabled."""
+        if self.history_enabled and self._atomic_depth == 0:
+            self.history.append(self.current_image.copy())
+
+    @contextmanager
+    def atomic_op(self) -> Iterator[None]:
+        """
+        Group several operations into a single undo step.
+        
+        The state is saved once on entering the outermost block; history
+        pushes made by operations inside it are skipped.
+        """
+        if self._atomic_depth == 0:
+            self._push_history()
+        self._atomic_depth += 1
+        try:
+            yield
+        finally:
+            self._atomic_depth -= 1
+
     def get_image_stats(self) -> Dict[str, float]:
         """
         Calculate basic image statistics for adaptive processing.
@@ -60,22 +90,17 @@ class BaseImageProcessor:
         else:
             analysis_image = self.current_image
             
-        stat = ImageStat.Stat(analysis_image)
-        
-        brightness = sum(stat.mean) / (3 * 255.0)
-        contrast = sum(stat.stddev) / (3 * 255.0)
-        
-        r, g, b = stat.mean
-        color_variance = np.std([r, g, b])
-        
-        edges = analysis_image.filter(ImageFilter.FIND_EDGES)
-        edge_stat = ImageStat.Stat(edges)
-        complexity = sum(edge_stat.mean) / (3 * 255.0)
+        # Brightness, contrast and colour variance come from one histogram
+        # pass; the edge mean is taken straight from the filtered array
+        # instead of building per-band ImageStat lists
+        base = ImageUtils.get_image_stats(analysis_image)
+        edges = ImageUtils.find_edges(analysis_image)
+        complexity = float(np.asarray(edges).mean()) / 255.0
         
         return {
-            'brightness': brightness,
-            'contrast': contrast,
-            'color_variance': color_variance,
+            'brightness': base['brightness'],
+            'contrast': base['contrast'],
+            'color_variance': base['color_variance'],
             'complexity': complexity
         }
 
@@ -83,7 +108,7 @@ class BaseImageProcessor:
         """
         Resize the current image.
         """
-        self.history.append(self.current_image.copy())
+        self._push_history()
         self.current_image = self.current_image.resize(size, resample)
 
     def ensure_rgb(self) -> None:
@@ -91,7 +116,7 @@ class BaseImageProcessor:
         Ensure image is in RGB mode.
         """
         if self.current_image.mode != 'RGB':
-            self.history.append(self.current_image.copy())
+            self._push_history()
             self.current_image = self.current_image.convert('RGB')
 
     def ensure_rgba(self) -> None:
@@ -99,7 +124,7 @@ class BaseImageProcessor:
         Ensure image is in RGBA mode.
         """
         if self.current_image.mode != 'RGBA':
-            self.history.append(self.current_image.copy())
+            self._push_history()
             self.current_image = self.current_image.convert('RGBA')
 
     def adjust_brightness(self, factor: float) -> None:
@@ -109,7 +134,7 @@ class BaseImageProcessor:
         Args:
             factor: Brightness adjustment factor (0.0 to 2.0)
         """
-        self.history.append(self.current_image.copy())
+        self._push_history()
         enhancer = ImageEnhance.Brightness(self.current_image)
         self.current_image = enhancer.enhance(factor)
 
@@ -120,9 +145,24 @@ class BaseImageProcessor:
         Args:
             factor: Contrast adjustment factor (0.0 to 2.0)
         """
-        self.history.append(self.current_image.copy())
-        enhancer = ImageEnhance.Contrast(self.current_image)
-        self.current_image = enhancer.enhance(factor)
+        self._push_history()
+        image = self.current_image
+        if image.mode not in ('L', 'RGB', 'RGBA'):
+            self.current_image = ImageEnhance.Contrast(image).enhance(factor)
+            return
+            
+        # ImageEnhance.Contrast blends every pixel with the mean grey level;
+        # that is a fixed mapping per level, so apply it as one lookup table
+        # instead of building a grey image and blending against it
+        grey = image if image.mode == 'L' else image.convert('L')
+        mean = np.float32(int(np.asarray(grey).mean() + 0.5))
+        levels = np.arange(256, dtype=np.float32)
+        lut = np.clip(mean + np.float32(factor) * (levels - mean), 0, 255).astype(np.uint8)
+        table = lut.tolist() * (1 if image.mode == 'L' else 3)
+        if image.mode == 'RGBA':
+            # Alpha is blended against itself, so it passes through
+            table += list(range(256))
+        self.current_image = image.point(table)
 
     def apply_blur(self, radius: float) -> None:
         """
@@ -131,10 +171,8 @@ class BaseImageProcessor:
         Args:
             radius: Blur radius
         """
-        self.history.append(self.current_image.copy())
-        self.current_image = self.current_image.filter(
-            ImageFilter.GaussianBlur(radius=radius)
-        )
+        self._push_history()
+        self.current_image = ImageUtils.gaussian_blur(self.current_image, radius)
 
     def apply_color_overlay(self, color: Tuple[int, int, int], alpha: int) -> None:
         """
@@ -145,7 +183,7 @@ class BaseImageProcessor:
             alpha: Opacity (0-255)
         """
         self.ensure_rgba()
-        self.history.append(self.current_image.copy())
+        self._push_history()
         
         overlay = Image.new('RGBA', self.current_image.size, (*color, alpha))
         self.current_image = Image.alpha_composite(self.current_image, overlay)
@@ -176,15 +214,23 @@ class BaseImageProcessor:
         if channel.upper() not in ['R', 'G', 'B', 'A']:
             raise ValueError("Channel must be 'R', 'G', 'B', or 'A'")
             
-        self.history.append(self.current_image.copy())
-        bands = list(self.current_image.split())
-        
+        self._push_history()
         channel_index = {'R': 0, 'G': 1, 'B': 2, 'A': 3}[channel.upper()]
         
-        if channel.upper() == 'A' and len(bands) == 3:
+        if channel.upper() == 'A' and len(self.current_image.getbands()) == 3:
             self.ensure_rgba()
-            bands = list(self.current_image.split())
             
+        if self.current_image.mode in ('RGB', 'RGBA') and data.mode == 'L':
+            # Write the plane into one array copy instead of splitting into
+            # per-band images and merging them back
+            if data.size != self.current_image.size:
+                raise ValueError("Channel data must match the image size")
+            arr = np.array(self.current_image)
+            arr[..., channel_index] = np.asarray(data)
+            self.current_image = Image.fromarray(arr)
+            return
+            
+        bands = list(self.current_image.split())
         bands[channel_index] = data
         self.current_image = Image.merge(self.current_image.mode, bands)
 
@@ -200,24 +246,21 @@ class BaseImageProcessor:
         if channel.upper() not in ['R', 'G', 'B']:
             raise ValueError("Channel must be 'R', 'G', or 'B'")
             
-        self.history.append(self.current_image.copy())
+        # Nothing moves, so skip the copy, roll and blur entirely
+        if offset_x == 0 and offset_y == 0:
+            return
+            
+        self._push_history()
         
         # Get the channel
         channel_data = self.get_channel(channel)
         
-        # Create offset version
-        width, height = self.current_image.size
-        offset_data = Image.new('L', (width, height), 0)
+        # Create wrapped offset version in a single array operation
+        shifted = np.roll(np.asarray(channel_data), (offset_y, offset_x), axis=(0, 1))
+        offset_data = Image.fromarray(shifted)
         
-        # Calculate wrapped coordinates
-        for y in range(height):
-            for x in range(width):
-                src_x = (x - offset_x) % width
-                src_y = (y - offset_y) % height
-                offset_data.putpixel((x, y), channel_data.getpixel((src_x, src_y)))
-                
         # Apply Gaussian blur for smoother transitions
-        offset_data = offset_data.filter(ImageFilter.GaussianBlur(0.5))
+        offset_data = ImageUtils.gaussian_blur(offset_data, 0.5)
         
         # Set the channel
         self.set_channel(channel, offset_data)
@@ -254,9 +297,18 @@ class BaseImageProcessor:
         """
         return self.current_image.copy()
 
+    def seed(self, seed: Union[int, np.random.SeedSequence, None]) -> None:
+        """
+        Reseed the generator random effects draw from.
+        
+        Args:
+            seed: Seed for np.random.default_rng; None for fresh entropy
+        """
+        self._rng = np.random.default_rng(seed)
+
     def reset(self) -> None:
         """
         Reset to original image.
         """
-        self.history = []
+        self.history.clear()
         self.current_image = self.original_image.copy()
\ No newline at end of file
@@ -1,13 +1,23 @@
-from PIL import Image, ImageStat
+from PIL import Image, ImageFilter
 import numpy as np
-from typing import Dict, Any, Optional, Tuple, Union, List, TypeVar, Callable
+from typing import Dict, Any, Optional, Tuple, Union, List, TypeVar, Callable, BinaryIO
 from pathlib import Path
 import math
+import os
+import tempfile
 from io import BytesIO
 
+try:
+    import cv2
+except ImportError:  # OpenCV is optional; Pillow handles all codecs without it
+    cv2 = None
+
+# Pillow's FIND_EDGES kernel
+_FIND_EDGES_KERNEL = np.array([[-1, -1, -1], [-1, 8, -1], [-1, -1, -1]], dtype=np.float32)
+
 # Type definitions
 Number = TypeVar('Number', int, float)
-ImageType = Union[str, bytes, Image.Image, BytesIO, Path]
+ImageType = Union[str, bytes, Image.Image, BytesIO, BinaryIO, Path]
 ParamValue = Union[Number, Tuple[Number, Number], List[Number]]
 
 class ImageUtils:
@@ -23,7 +33,7 @@ class ImageUtils:
                 - str/Path: Path to image file
                 - bytes: Raw image data
                 - Image.Image: PIL Image object
-                - BytesIO: BytesIO containing image data
+                - BytesIO/BinaryIO: Readable binary stream containing image data
         
         Returns:
             PIL.Image: Loaded image
@@ -39,16 +49,144 @@ class ImageUtils:
                     raise ValueError(f"Input image not found: {image_input}")
                 return Image.open(path)
             elif isinstance(image_input, bytes):
-                return Image.open(BytesIO(image_input))
+                return ImageUtils.decode_image(image_input)
             elif isinstance(image_input, Image.Image):
                 return image_input
-            elif isinstance(image_input, BytesIO):
-                return Image.open(image_input)
+            elif hasattr(image_input, 'read'):
+                return ImageUtils.decode_image(image_input.read())
             else:
                 raise ValueError(f"Unsupported image input type: {type(image_input)}")
         except Exception as e:
             raise IOError(f"Failed to load image: {str(e)}")
 
+    @staticmethod
+    def decode_image(data: bytes) -> Image.Image:
+        """
+        Decode encoded image bytes, using OpenCV's codecs when available.
+        
+        Pillow always parses the header first, so its MAX_IMAGE_PIXELS
+        decompression bomb check applies before OpenCV decodes anything.
+        GIFs and other multi-frame images stay with Pillow, which keeps
+        their palette and frames where OpenCV would flatten them to one RGB
+        frame, as do images OpenCV cannot represent as 8-bit L/RGB/RGBA
+        (e.g. 16-bit PNGs).
+        
+        Args:
+            data: Encoded image data
+            
+        Returns:
+            PIL.Image: Decoded image
+            
+        Raises:
+            PIL.Image.DecompressionBombError: If the image is too large
+        """
+        # Image.open only reads the header and runs the size check
+        image = Image.open(BytesIO(data))
+        if cv2 is not None and image.format != 'GIF' and not getattr(image, 'is_animated', False):
+            arr = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_UNCHANGED)
+            if arr is not None and arr.dtype == np.uint8:
+                if arr.ndim == 2:
+                    return Image.fromarray(arr)
+                if arr.shape[2] == 3:
+                    return Image.fromarray(cv2.cvtColor(arr, cv2.COLOR_BGR2RGB))
+                if arr.shape[2] == 4:
+                    return Image.fromarray(cv2.cvtColor(arr, cv2.COLOR_BGRA2RGBA))
+        return image
+
+    @staticmethod
+    def encode_png(image: Image.Image, compress_level: int = 6) -> bytes:
+        """
+        Encode an image as PNG, using OpenCV's encoder when available.
+        
+        Args:
+            image: Image to encode
+            compress_level: zlib compression level (0-9)
+            
+        Returns:
+            PNG-encoded bytes
+        """
+        if cv2 is not None and image.mode in ('L', 'RGB', 'RGBA'):
+            arr = np.asarray(image)
+            if image.mode == 'RGB':
+                arr = cv2.cvtColor(arr, cv2.COLOR_RGB2BGR)
+            elif image.mode == 'RGBA':
+                arr = cv2.cvtColor(arr, cv2.COLOR_RGBA2BGRA)
+            ok, encoded = cv2.imencode('.png', arr, [cv2.IMWRITE_PNG_COMPRESSION, compress_level])
+            if ok:
+                return encoded.tobytes()
+                
+        output = BytesIO()
+        image.save(output, format='PNG', compress_level=compress_level, optimize=False)
+        return output.getvalue()
+
+    @staticmethod
+    def encode_jpeg(image: Image.Image, quality: int = 75) -> bytes:
+        """
+        Encode an image as JPEG, using OpenCV's encoder when available.
+        
+        Args:
+            image: Image to encode
+            quality: JPEG quality (1-95), defaulting to Pillow's default
+            
+        Returns:
+            JPEG-encoded bytes
+        """
+        if cv2 is not None and image.mode in ('L', 'RGB'):
+            arr = np.asarray(image)
+            if image.mode == 'RGB':
+                arr = cv2.cvtColor(arr, cv2.COLOR_RGB2BGR)
+            ok, encoded = cv2.imencode('.jpg', arr, [cv2.IMWRITE_JPEG_QUALITY, quality])
+            if ok:
+                return encoded.tobytes()
+                
+        output = BytesIO()
+        image.save(output, format='JPEG', quality=quality)
+        return output.getvalue()
+
+    @staticmethod
+    def gaussian_blur(image: Image.Image, radius: float) -> Image.Image:
+        """
+        Gaussian-blur an image, using OpenCV for small radii when available.
+        
+        OpenCV's true Gaussian kernel is several times faster than Pillow up
+        to a radius of about 8, but its cost grows with the radius while
+        Pillow's box approximation stays flat, so large radii stay on Pillow.
+        
+        Args:
+            image: Image to blur
+            radius: Blur radius (standard deviation in pixels)
+            
+        Returns:
+            Blurred image
+        """
+        if cv2 is not None and 0 < radius <= 8 and image.mode in ('L', 'RGB', 'RGBA'):
+            arr = cv2.GaussianBlur(np.asarray(image), (0, 0), sigmaX=radius,
+                                   borderType=cv2.BORDER_REPLICATE)
+            return Image.fromarray(arr)
+        return image.filter(ImageFilter.GaussianBlur(radius=radius))
+
+    @staticmethod
+    def find_edges(image: Image.Image) -> Image.Image:
+        """
+        Apply Pillow's FIND_EDGES filter, using OpenCV when available.
+        
+        OpenCV convolves the same 3x3 kernel with identical saturation;
+        Pillow leaves the outermost rows and columns unfiltered, so those
+        are copied from the source to give the same result.
+        
+        Args:
+            image: Image to filter
+            
+        Returns:
+            Edge-filtered image
+        """
+        if cv2 is not None and image.mode in ('L', 'RGB') and min(image.size) >= 3:
+            arr = np.asarray(image)
+            out = arr.copy()
+            out[1:-1, 1:-1] = cv2.filter2D(arr, -1, _FIND_EDGES_KERNEL)[1:-1, 1:-1]
+            return Image.fromarray(out)
+        return image.filter(ImageFilter.FIND_EDGES)
+
     @staticmethod
     def ensure_rgb(image: Image.Image) -> Image.Image:
         """
@@ -91,28 +229,37 @@ class ImageUtils:
             Dictionary containing image statistics
         """
         analysis_image = ImageUtils.ensure_rgb(image)
-        stat = ImageStat.Stat(analysis_image)
+        
+        # One histogram pass feeds both the statistics and the distribution.
+        # Per-band moments are dot products with the levels, computed as
+        # ImageStat does but without its Python loops over every bin
+        counts = np.asarray(analysis_image.histogram(), dtype=np.int64).reshape(3, 256)
+        levels = np.arange(256, dtype=np.int64)
+        totals = counts.sum(axis=1)
+        n = np.maximum(totals, 1).astype(np.float64)
+        sums = (counts @ levels).astype(np.float64)
+        sums2 = (counts @ (levels * levels)).astype(np.float64)
+        mean = (sums / n).tolist()
+        stddev = np.sqrt((sums2 - sums ** 2.0 / n) / n).tolist()
         
         # Basic statistics
-        brightness = sum(stat.mean) / (3 * 255.0)
-        contrast = sum(stat.stddev) / (3 * 255.0)
+        brightness = sum(mean) / (3 * 255.0)
+        contrast = sum(stddev) / (3 * 255.0)
         
         # Color analysis
-        r, g, b = stat.mean
+        r, g, b = mean
         color_variance = np.std([r, g, b])
         
         # Calculate color distribution
-        hist = analysis_image.histogram()
-        total_pixels = sum(hist)
-        color_distribution = [sum(hist[i:i+256]) / total_pixels for i in range(0, 768, 256)]
+        color_distribution = (totals / totals.sum()).tolist()
         
         return {
             'brightness': brightness,
             'contrast': contrast,
             'color_variance': color_variance,
             'color_distribution': color_distribution,
-            'mean_values': stat.mean,
-            'stddev_values': stat.stddev
+            'mean_values': mean,
+            'stddev_values': stddev
         }
 
     @staticmethod
@@ -240,19 +387,15 @@ class ImageUtils:
         Returns:
             Path object for temporary file
         """
-        import tempfile
-        
         if directory:
             directory = Path(directory)
             directory.mkdir(parents=True, exist_ok=True)
         
-        with tempfile.NamedTemporaryFile(
-            prefix=prefix,
-            suffix=suffix,
-            dir=directory,
-            delete=False
-        ) as tmp:
-            return Path(tmp.name)
+        # mkstemp creates the file without wrapping it in a file object;
+        # only the descriptor needs closing
+        fd, name = tempfile.mkstemp(prefix=prefix, suffix=suffix, dir=directory)
+        os.close(fd)
+        return Path(name)
 
     @staticmethod
     def cleanup_temp_files(paths: List[Union[str, Path]]) -> None:
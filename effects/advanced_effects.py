@@ -7,38 +7,107 @@ These effects are used by the EffectProcessor class to create various visual tra
 
 from typing import Tuple, Optional, Union, Dict, Any
 import numpy as np
-from PIL import Image, ImageDraw, ImageEnhance, ImageFilter
-import colorsys
+from PIL import Image, ImageEnhance, ImageFilter
+import functools
 import math
 
+from core.utils import ImageUtils
 
+try:
+    from numba import njit, prange
+except ImportError:  # Numba is optional; the NumPy paths below work without it
+    njit = None
+
+if njit is not None:
+    @njit(cache=True)
+    def _glitch_rows_jit(arr, rows, shifts):
+        """Roll each listed row's channels in place, one row buffer reused throughout."""
+        width, channels = arr.shape[1], arr.shape[2]
+        row = np.empty((width, channels), dtype=arr.dtype)
+        for k in range(rows.shape[0]):
+            y = rows[k]
+            row[:, :] = arr[y]
+            for x in range(width):
+                for c in range(channels):
+                    arr[y, x, c] = row[(x - shifts[k, c]) % width, c]
+
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _energy_jit(arr, intensity):
+        """Fused sine displacement over the color channels, in place."""
+        height, width = arr.shape[0], arr.shape[1]
+        for y in prange(height):
+            for x in range(width):
+                d = math.sin(0.1 * (x + y)) * intensity * 30
+                for c in range(3):
+                    v = arr[y, x, c] + d
+                    arr[y, x, c] = 0 if v < 0 else 255 if v > 255 else np.uint8(v)
+
+
+
+@functools.lru_cache(maxsize=8)
+def _energy_basis(height: int, width: int) -> np.ndarray:
+    """
+    Build the unscaled energy sine pattern, memoized per size.
+    
+    The returned array is shared between callers and must not be modified.
+    """
+    # Angle-addition identity, so only rows and columns need a sine/cosine
+    rows = np.arange(height) * 0.1
+    cols = np.arange(width) * 0.1
+    basis = np.multiply.outer(np.cos(rows), np.sin(cols))
+    basis += np.multiply.outer(np.sin(rows), np.cos(cols))
+    basis.setflags(write=False)
+    return basis
+
+def _energy_distortion(height: int, width: int, intensity: float) -> np.ndarray:
+    """
+    Scale the cached sine pattern into the energy displacement map.
+    
+    Stored floored as int16: adding it to integer pixels gives the same
+    values as adding the float map and truncating.
+    """
+    distortion = _energy_basis(height, width) * intensity
+    distortion *= 30
+    return np.floor(distortion, out=distortion).astype(np.int16)
+
+@functools.lru_cache(maxsize=32)
+def _scanline_overlay(width: int, height: int, gap: int, alpha: int) -> Image.Image:
+    """
+    Build the RGBA scan line overlay, memoized per size, gap and alpha.
+    
+    The returned image is shared between callers and must not be modified.
+    """
+    overlay = np.zeros((height, width, 4), dtype=np.uint8)
+    overlay[::gap, :, 3] = alpha
+    return Image.fromarray(overlay)
+
+def _shift_red_blue(arr: np.ndarray, max_offset: int) -> None:
+    """
+    Shift red right and blue left by max_offset pixels, in place.
+    
+    Integer shifts as slice copies, exposing black at the edges like the
+    affine transforms this replaced.
+    """
+    if max_offset == 0:
+        return
+    arr[:, max_offset:, 0] = arr[:, :-max_offset, 0]
+    arr[:, :max_offset, 0] = 0
+    arr[:, :-max_offset, 2] = arr[:, max_offset:, 2]
+    arr[:, -max_offset:, 2] = 0
 
 def create_channel_pass_frame(base_image: Image.Image, offset_values: Tuple[float, float]) -> Image.Image:
     """Create a frame with RGB channel offsets"""
-    img = base_image.convert('RGBA')
+    img = ImageUtils.ensure_rgba(base_image)
     width, height = img.size
     
-    r, g, b, a = img.split()
-    
     g_offset = int(offset_values[0] * width) % width
     b_offset = int(offset_values[1] * width) % width
     
-    # Create output image
-    result = Image.new('RGBA', (width, height), (0, 0, 0, 0))
-    
-    # Create wrapped green channel
-    g_temp = Image.new('L', (width, height))
-    g_temp.paste(g.crop((0, 0, width - g_offset, height)), (g_offset, 0))
-    g_temp.paste(g.crop((width - g_offset, 0, width, height)), (0, 0))
-    
-    # Create wrapped blue channel
-    b_temp = Image.new('L', (width, height))
-    b_temp.paste(b.crop((0, 0, width - b_offset, height)), (b_offset, 0))
-    b_temp.paste(b.crop((width - b_offset, 0, width, height)), (0, 0))
-    
-    # Merge channels back together
-    result = Image.merge('RGBA', (r, g_temp, b_temp, a))
-    return result
+    # Wrap the green and blue channels right on one array
+    arr = np.array(img)
+    arr[..., 1] = np.roll(arr[..., 1], g_offset, axis=1)
+    arr[..., 2] = np.roll(arr[..., 2], b_offset, axis=1)
+    return Image.fromarray(arr)
 
 def apply_glitch_effect(
     image: Image.Image,
@@ -65,25 +134,37 @@ def apply_glitch_effect(
     
     # Convert to numpy array for efficient processing
     arr = np.array(image)
-    height = arr.shape[0]
+    height, width = arr.shape[:2]
     
     # Number of glitch lines based on intensity
     num_lines = int(intensity * height * 0.1)  # Up to 10% of height
-    
-    # Create glitch effects
-    for _ in range(num_lines):
-        # Random line position and offset
-        y = np.random.randint(0, height-1)
-        offset = np.random.randint(-int(intensity * 20), int(intensity * 20))
-        
-        # Shift line horizontally
-        if 0 <= y < height:
-            arr[y, :] = np.roll(arr[y, :], offset, axis=0)
-            
-        # Add color shifting for stronger glitches
-        if intensity > 0.7 and np.random.random() < 0.3:
-            channel = np.random.randint(0, 3)
-            arr[y, :, channel] = np.roll(arr[y, :, channel], offset * 2)
+    max_offset = int(intensity * 20)
+    if num_lines == 0 or max_offset == 0 or height < 2:
+        return Image.fromarray(arr)
+    
+    # Random line positions and offsets, drawn for all lines at once
+    ys = np.random.randint(0, height - 1, num_lines)
+    offsets = np.random.randint(-max_offset, max_offset, num_lines)
+    
+    # Rolls along a row commute, so shifting lines one after another leaves
+    # each (row, channel) rolled by the sum of every offset applied to it;
+    # accumulate those sums, including the colour shifts of strong glitches
+    view = arr if arr.ndim == 3 else arr[..., None]
+    shifts = np.zeros((height, view.shape[2]), dtype=np.int64)
+    np.add.at(shifts, ys, offsets[:, None])
+    if intensity > 0.7 and arr.ndim == 3:
+        shifted = np.random.random(num_lines) < 0.3
+        channels = np.random.randint(0, 3, np.count_nonzero(shifted))
+        np.add.at(shifts, (ys[shifted], channels), 2 * offsets[shifted])
+    
+    # Apply every row's total in one gather: column x of a row shifted by s
+    # reads from (x - s) mod width, as np.roll would
+    rows = np.unique(ys)
+    if njit is not None and arr.ndim == 3:
+        _glitch_rows_jit(arr, rows, shifts[rows])
+    else:
+        columns = (np.arange(width)[:, None] - shifts[rows][:, None, :]) % width
+        view[rows] = np.take_along_axis(view[rows], columns, axis=1)
     
     return Image.fromarray(arr)
 
@@ -104,21 +185,13 @@ def apply_chromatic_aberration(
     if not 0 <= offset <= 1:
         raise ValueError("Offset must be between 0 and 1")
     
-    # Split into RGB channels
-    r, g, b = image.split()
-    
     # Calculate pixel offsets based on image size
     width, _ = image.size
     max_offset = int(width * offset * 0.1)  # Up to 10% of width
     
-    # Create new image with offset channels
-    result = Image.merge('RGB', (
-        r.transform(r.size, Image.AFFINE, (1, 0, -max_offset, 0, 1, 0)),  # Red left
-        g,  # Green center
-        b.transform(b.size, Image.AFFINE, (1, 0, max_offset, 0, 1, 0))    # Blue right
-    ))
-    
-    return result
+    arr = np.array(ImageUtils.ensure_rgb(image))
+    _shift_red_blue(arr, max_offset)
+    return Image.fromarray(arr)
 
 def apply_scan_lines(
     image: Image.Image,
@@ -141,21 +214,10 @@ def apply_scan_lines(
     if not 0 <= opacity <= 1:
         raise ValueError("Opacity must be between 0 and 1")
     
-    # Create scan line overlay
-    overlay = Image.new('RGBA', image.size, (0, 0, 0, 0))
-    draw = ImageDraw.Draw(overlay)
-    
-    # Draw horizontal lines
-    for y in range(0, image.size[1], gap):
-        alpha = int(opacity * 255)
-        draw.line([(0, y), (image.size[0], y)], fill=(0, 0, 0, alpha))
-    
-    # Convert image to RGBA if necessary
-    if image.mode != 'RGBA':
-        image = image.convert('RGBA')
+    overlay = _scanline_overlay(image.size[0], image.size[1], gap, int(opacity * 255))
     
-    # Composite with original
-    return Image.alpha_composite(image, overlay)
+    # Composite with original, converting to RGBA only if necessary
+    return Image.alpha_composite(ImageUtils.ensure_rgba(image), overlay)
 
 def apply_noise_effect(
     image: Image.Image,
@@ -176,17 +238,18 @@ def apply_noise_effect(
     if not 0 <= intensity <= 1:
         raise ValueError("Intensity must be between 0 and 1")
     
-    if seed is not None:
-        np.random.seed(seed)
+    rng = np.random.default_rng(seed)
     
     # Convert to numpy array
-    arr = np.array(image)
+    arr = np.asarray(image)
     
-    # Generate noise for each channel
-    noise = np.random.normal(0, intensity * 50, arr.shape)
-    noisy = np.clip(arr + noise, 0, 255).astype(np.uint8)
+    # Generate float32 noise for each channel, then add and clip in place
+    noise = rng.standard_normal(arr.shape, dtype=np.float32)
+    noise *= intensity * 50
+    noise += arr
+    np.clip(noise, 0, 255, out=noise)
     
-    return Image.fromarray(noisy)
+    return Image.fromarray(noise.astype(np.uint8))
 
 def apply_energy_effect(
     image: Image.Image,
@@ -207,20 +270,19 @@ def apply_energy_effect(
     
     # Convert to numpy array
     arr = np.array(image)
+    if njit is not None:
+        _energy_jit(arr, float(intensity))
+        return Image.fromarray(arr)
+        
+    distortion = _energy_distortion(arr.shape[0], arr.shape[1], float(intensity))
     
-    # Create displacement map
-    x = np.arange(arr.shape[1])
-    y = np.arange(arr.shape[0])
-    X, Y = np.meshgrid(x, y)
-    
-    # Generate distortion pattern
-    distortion = np.sin(X * 0.1 + Y * 0.1) * intensity * 30
-    
-    # Apply to each channel
-    for c in range(3):
-        arr[:,:,c] = np.clip(arr[:,:,c] + distortion, 0, 255)
+    # Apply to all color channels in one broadcast pass
+    shifted = arr[..., :3].astype(np.int16)
+    shifted += distortion[:, :, None]
+    np.clip(shifted, 0, 255, out=shifted)
+    arr[..., :3] = shifted
     
-    return Image.fromarray(arr.astype(np.uint8))
+    return Image.fromarray(arr)
 
 def apply_pulse_effect(
     image: Image.Image,
@@ -239,9 +301,20 @@ def apply_pulse_effect(
     if not 0 <= intensity <= 1:
         raise ValueError("Intensity must be between 0 and 1")
     
-    enhancer = ImageEnhance.Brightness(image)
     pulse_factor = 1.0 + intensity
-    return enhancer.enhance(pulse_factor)
+    if image.mode not in ('L', 'RGB', 'RGBA'):
+        return ImageEnhance.Brightness(image).enhance(pulse_factor)
+    
+    # One multiply over the color bands, in single precision and truncated
+    # as ImageEnhance.Brightness does, without blending against a black
+    # image; alpha is left untouched
+    arr = np.array(image)
+    color = arr[..., :3] if arr.ndim == 3 else arr
+    scaled = color.astype(np.float32)
+    scaled *= np.float32(pulse_factor)
+    np.clip(scaled, 0, 255, out=scaled)
+    color[...] = scaled
+    return Image.fromarray(arr)
 
 def apply_consciousness_effect(
     image: Image.Image,
@@ -260,14 +333,27 @@ def apply_consciousness_effect(
     if not 0 <= intensity <= 1:
         raise ValueError("Intensity must be between 0 and 1")
     
-    # Apply multiple effects in sequence
-    result = apply_energy_effect(image, intensity * 0.5)
-    result = apply_pulse_effect(result, intensity * 0.3)
+    # Energy, pulse and chromatic aberration fused over one float32 buffer,
+    # matching the three effects applied in sequence
+    arr = np.array(image)
+    height, width = arr.shape[:2]
+    distortion = _energy_distortion(height, width, float(intensity * 0.5))
+    
+    color = arr[..., :3].astype(np.float32)
+    color += distortion[:, :, None]
+    np.clip(color, 0, 255, out=color)
+    
+    # Brightness multiplies in single precision and truncates, as
+    # ImageEnhance.Brightness does; alpha is left untouched
+    color *= np.float32(1.0 + intensity * 0.3)
+    np.clip(color, 0, 255, out=color)
+    arr[..., :3] = color
     
     if intensity > 0.5:
-        result = apply_chromatic_aberration(result, intensity * 0.4)
+        arr = np.ascontiguousarray(arr[..., :3])
+        _shift_red_blue(arr, int(width * (intensity * 0.4) * 0.1))
     
-    return result
+    return Image.fromarray(arr)
 
 def create_effect_mask(
     size: Tuple[int, int],
@@ -288,29 +374,31 @@ def create_effect_mask(
     if not 0 <= intensity <= 1:
         raise ValueError("Intensity must be between 0 and 1")
     
-    mask = Image.new('L', size, 0)
-    draw = ImageDraw.Draw(mask)
+    # Each branch builds its mask from an array; an empty one is only
+    # allocated when none applies
+    mask = None
     
     if effect_type == 'radial':
-        # Radial gradient from center
+        # Radial gradient from center, computed as one distance field
         center = (size[0] // 2, size[1] // 2)
         max_radius = math.sqrt(center[0]**2 + center[1]**2)
-        for r in range(int(max_radius)):
-            opacity = int(255 * (1 - r / max_radius) * intensity)
-            draw.ellipse([
-                center[0] - r, center[1] - r,
-                center[0] + r, center[1] + r
-            ], fill=opacity)
+        if max_radius > 0:
+            yy, xx = np.ogrid[:size[1], :size[0]]
+            r = np.hypot(xx - center[0], yy - center[1])
+            falloff = np.clip(1 - r / max_radius, 0, 1)
+            mask = Image.fromarray((255 * falloff * intensity).astype(np.uint8))
             
     elif effect_type == 'linear':
-        # Linear gradient
-        for x in range(size[0]):
-            opacity = int(255 * (x / size[0]) * intensity)
-            draw.line([(x, 0), (x, size[1])], fill=opacity)
+        # Linear gradient, one column ramp broadcast down every row
+        ramp = (255 * (np.arange(size[0]) / size[0]) * intensity).astype(np.uint8)
+        mask = Image.fromarray(np.broadcast_to(ramp, (size[1], size[0])))
             
     elif effect_type == 'noise':
-        # Random noise pattern
-        arr = np.random.rand(*size) * intensity * 255
-        mask = Image.fromarray(arr.astype(np.uint8))
+        # Random noise pattern, drawn directly as (height, width) bytes
+        rng = np.random.default_rng()
+        arr = rng.integers(0, int(intensity * 255) + 1, size=(size[1], size[0]), dtype=np.uint8)
+        mask = Image.fromarray(arr)
         
+    if mask is None:
+        mask = Image.new('L', size, 0)
     return mask
\ No newline at end of file
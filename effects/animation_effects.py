@@ -9,8 +9,14 @@ from typing import Dict, Any, List, Tuple, Optional, Union, Callable
 import numpy as np
 from PIL import Image, ImageChops, ImageEnhance
 from pathlib import Path
+from itertools import repeat
+from multiprocessing import shared_memory
+import functools
 import math
+import os
 
+from core.utils import ImageUtils
+from core.animation_processor import SharedBase, get_frame_executor, load_shared_base
 
 
 from .advanced_effects import (
@@ -27,13 +33,36 @@ from .advanced_effects import (
 from .basic_effects import (
     EFFECT_PARAMS,
     EFFECT_DEFAULTS,
-    ANIMATION_PRESETS
+    ANIMATION_PRESETS,
+    PRESET_EFFECTS
 )
 
+# Effect functions available to animation frames, by name
+_EFFECT_MAP: Dict[str, Callable[..., Image.Image]] = {
+    'glitch': apply_glitch_effect,
+    'chroma': apply_chromatic_aberration,
+    'scan': apply_scan_lines,
+    'noise': apply_noise_effect,
+    'energy': apply_energy_effect,
+    'pulse': apply_pulse_effect,
+    'consciousness': apply_consciousness_effect
+}
+
+def _check_effect_names(effects: List[Tuple[str, Dict[str, Any]]]) -> None:
+    """Reject unknown effects before any of them is applied."""
+    for effect_name, _ in effects:
+        if effect_name not in _EFFECT_MAP:
+            raise ValueError(f"Unknown effect: {effect_name}")
+
+@functools.lru_cache(maxsize=1024)
 def ease_value(value: float, easing_type: str = 'linear') -> float:
     """
     Apply easing function to a value.
     
+    Memoized: animations sample the same frame positions (i / (n - 1))
+    for every frame count they render, so repeated calls are a single
+    lookup rather than the branch chain and transcendental math.
+    
     Args:
         value: Input value between 0 and 1
         easing_type: Type of easing function to apply
@@ -129,23 +158,34 @@ def interpolate_keyframes(keyframes: List[float], total_frames: int) -> List[flo
     segments = len(keyframes) - 1
     frames_per_segment = total_frames // segments
     
-    interpolated = []
-    for i in range(segments):
-        start_val = keyframes[i]
-        end_val = keyframes[i + 1]
-        
-        # Calculate frames for this segment
-        if i == segments - 1:
-            segment_frames = total_frames - len(interpolated)
-        else:
-            segment_frames = frames_per_segment
-            
-        for frame in range(segment_frames):
-            progress = frame / segment_frames
-            value = start_val + (end_val - start_val) * progress
-            interpolated.append(value)
-            
-    return interpolated
+    # Each segment gets frames_per_segment frames (the last one takes the
+    # remainder), sampled from its start value up to but excluding its end;
+    # express that as fractional keyframe positions and interpolate at once
+    frame = np.arange(total_frames)
+    if frames_per_segment:
+        segment = np.minimum(frame // frames_per_segment, segments - 1)
+    else:
+        segment = np.full(total_frames, segments - 1)
+    last_frames = total_frames - (segments - 1) * frames_per_segment
+    segment_frames = np.where(segment == segments - 1, last_frames, frames_per_segment)
+    position = segment + (frame - segment * frames_per_segment) / segment_frames
+    
+    return np.interp(position, np.arange(len(keyframes)), keyframes).tolist()
+
+# Shorter channel passes render in-process: each frame is only two channel
+# rolls, so shipping a few frames back from the pool costs more than it saves
+_MIN_PARALLEL_FRAMES = 16
+
+# Base image of the last channel pass rendered in this process, keyed by the
+# shared memory block it was loaded from
+_channel_pass_base: Optional[Tuple[str, Image.Image]] = None
+
+def _render_channel_pass_frame(base: SharedBase, offsets: Tuple[float, float]) -> Image.Image:
+    """Render one channel-pass frame in a worker of the shared pool."""
+    global _channel_pass_base
+    if _channel_pass_base is None or _channel_pass_base[0] != base[2]:
+        _channel_pass_base = (base[2], load_shared_base(base))
+    return create_channel_pass_frame(_channel_pass_base[1], offsets)
 
 def generate_channel_pass_frames(
     base_image: Image.Image,
@@ -153,8 +193,12 @@ def generate_channel_pass_frames(
     num_frames: int = 60
 ) -> List[Image.Image]:
     """Generate frames with RGB channel offset animation"""
-    frames = []
-    base_image = ImageUtils.ensure_even_dimensions(base_image)
+    # Pad to even dimensions for video encoding
+    base_image = ImageUtils.ensure_rgba(base_image)
+    width, height = base_image.size
+    even_size = ImageUtils.ensure_size_even(width, height)
+    if even_size != (width, height):
+        base_image = base_image.crop((0, 0, *even_size))
     
     # Get keyframe values
     g_keyframes = params.get('g_values', [0, 0.2, 0])
@@ -164,12 +208,29 @@ def generate_channel_pass_frames(
     g_values = interpolate_keyframes(g_keyframes, num_frames)
     b_values = interpolate_keyframes(b_keyframes, num_frames)
     
-    for i in range(num_frames):
-        # Create frame with current offset values
-        frame = create_channel_pass_frame(base_image, (g_values[i], b_values[i]))
-        frames.append(frame)
+    offsets = list(zip(g_values, b_values))
+    workers = os.cpu_count() or 1
+    if workers == 1 or num_frames < _MIN_PARALLEL_FRAMES:
+        return [create_channel_pass_frame(base_image, offset) for offset in offsets]
         
-    return frames
+    # Frames are independent, so render them on the shared animation pool;
+    # workers read the base image from shared memory and each task only
+    # carries a reference to it and its two offsets
+    pixels = base_image.tobytes()
+    shm = shared_memory.SharedMemory(create=True, size=len(pixels))
+    try:
+        shm.buf[:len(pixels)] = pixels
+        base = (base_image.mode, base_image.size, shm.name)
+        return list(get_frame_executor().map(
+            _render_channel_pass_frame,
+            repeat(base),
+            offsets,
+            chunksize=max(1, num_frames // (4 * workers))
+        ))
+    finally:
+        shm.close()
+        shm.unlink()
+
 def create_animation_frame(
     base_image: Image.Image,
     effects: List[Tuple[str, Dict[str, Any]]],
@@ -191,37 +252,25 @@ def create_animation_frame(
     if not 0 <= progress <= 1:
         raise ValueError("Progress must be between 0 and 1")
         
-    frame = base_image.copy()
+    _check_effect_names(effects)
+    eased_progress = ease_value(progress, easing_type)
+    
+    # Every effect returns a new image and leaves its input untouched, so
+    # the base image can be handed straight to the first one
+    frame = base_image
     
     for effect_name, params in effects:
-        # Get effect function
-        effect_map = {
-            'glitch': apply_glitch_effect,
-            'chroma': apply_chromatic_aberration,
-            'scan': apply_scan_lines,
-            'noise': apply_noise_effect,
-            'energy': apply_energy_effect,
-            'pulse': apply_pulse_effect,
-            'consciousness': apply_consciousness_effect
-        }
-        
-        if effect_name not in effect_map:
-            raise ValueError(f"Unknown effect: {effect_name}")
-            
-        effect_func = effect_map[effect_name]
-        
         # Interpolate parameters if they're animated
         frame_params = {}
         for param_name, param_value in params.items():
             if isinstance(param_value, tuple) and len(param_value) == 2:
                 start, end = param_value
-                eased_progress = ease_value(progress, easing_type)
                 frame_params[param_name] = start + (end - start) * eased_progress
             else:
                 frame_params[param_name] = param_value
         
         # Apply effect
-        frame = effect_func(frame, **frame_params)
+        frame = _EFFECT_MAP[effect_name](frame, **frame_params)
     
     return frame
 
@@ -258,23 +307,24 @@ def create_transition_frame(
     elif transition_type == 'slide':
         width, height = image1.size
         offset = int(width * eased_progress)
-        frame = Image.new('RGBA', image1.size)
-        frame.paste(image1, (-offset, 0))
-        frame.paste(image2, (width - offset, 0))
-        return frame
+        # The two images tile the frame exactly, so join their visible
+        # strips directly instead of pasting onto a blank canvas
+        left = np.asarray(ImageUtils.ensure_rgba(image1))[:, offset:]
+        right = np.asarray(ImageUtils.ensure_rgba(image2))[:, :offset]
+        return Image.fromarray(np.concatenate((left, right), axis=1))
     elif transition_type == 'zoom':
-        scale = 1 + eased_progress
-        sized_frame = image1.resize(
-            (int(width * scale), int(height * scale)),
-            Image.Resampling.LANCZOS
-        )
-        frame = Image.new('RGBA', image1.size)
-        frame.paste(
-            sized_frame,
-            (int((width - sized_frame.width) / 2),
-             int((height - sized_frame.height) / 2))
+        # Sample the centre 1/scale of image1 straight at the output size
+        # with one affine transform, rather than upscaling the whole image
+        # and pasting it centred onto a blank canvas
+        width, height = image1.size
+        inv = 1 / (1 + eased_progress)
+        zoomed = ImageUtils.ensure_rgba(image1).transform(
+            image1.size,
+            Image.Transform.AFFINE,
+            (inv, 0, width * (1 - inv) / 2, 0, inv, height * (1 - inv) / 2),
+            Image.Resampling.BICUBIC
         )
-        return Image.blend(frame, image2, eased_progress)
+        return Image.blend(zoomed, ImageUtils.ensure_rgba(image2), eased_progress)
     else:
         raise ValueError(f"Unknown transition type: {transition_type}")
 
@@ -299,9 +349,10 @@ def apply_animation_preset(
     if preset_name not in ANIMATION_PRESETS:
         raise ValueError(f"Unknown preset: {preset_name}")
         
-    preset = ANIMATION_PRESETS[preset_name].copy()
-    if custom_params:
-        preset['params'].update(custom_params)
-    
-    effects = [(name, params) for name, params in preset['params'].items()]
-    return create_animation_frame(base_image, effects, progress)
\ No newline at end of file
+    if not custom_params:
+        return create_animation_frame(base_image, PRESET_EFFECTS[preset_name], progress)
+        
+    # Merge into a new dict; the shared preset is read-only
+    params = dict(ANIMATION_PRESETS[preset_name]['params'])
+    params.update(custom_params)
+    return create_animation_frame(base_image, list(params.items()), progress)
\ No newline at end of file
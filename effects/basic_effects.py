@@ -5,8 +5,9 @@ Core effect definitions and configurations for image processing system.
 Contains effect ordering, default parameters, and animation presets.
 """
 
-from typing import Dict, Any, List, Union, Tuple, Optional
+from typing import Dict, Any, List, Union, Tuple, Optional, Callable, Mapping
 from dataclasses import dataclass
+from types import MappingProxyType
 
 # Effect execution order - maintains consistent layering of effects
 EFFECT_ORDER: List[str] = [
@@ -95,8 +96,15 @@ EFFECT_PARAMS: Dict[str, Dict[str, Any]] = {
     }
 }
 
-# Default parameter values for each effect
-EFFECT_DEFAULTS: Dict[str, Dict[str, Union[float, int]]] = {
+def _freeze(value: Any) -> Any:
+    """Recursively wrap dicts in read-only mapping proxies."""
+    if isinstance(value, dict):
+        return MappingProxyType({k: _freeze(v) for k, v in value.items()})
+    return value
+
+# Default parameter values for each effect. Read-only, so get_defaults can
+# return them without a copy
+EFFECT_DEFAULTS: Mapping[str, Mapping[str, Union[float, int]]] = _freeze({
     'glitch': {'intensity': 0.5},
     'chroma': {'offset': 0.5},
     'scan': {'gap': 2, 'opacity': 0.5},
@@ -104,10 +112,11 @@ EFFECT_DEFAULTS: Dict[str, Dict[str, Union[float, int]]] = {
     'energy': {'intensity': 0.5},
     'pulse': {'intensity': 0.5},
     'consciousness': {'intensity': 0.5}
-}
+})
 
-# Predefined animation presets
-ANIMATION_PRESETS: Dict[str, Dict[str, Any]] = {
+# Predefined animation presets. Read-only, so the effect lists below can
+# be handed out without defensive copies
+ANIMATION_PRESETS: Mapping[str, Mapping[str, Any]] = _freeze({
     'cyberpunk': {
         'params': {
             'glitch': {'intensity': (0.3, 0.8)},
@@ -139,6 +148,50 @@ ANIMATION_PRESETS: Dict[str, Dict[str, Any]] = {
         'fps': 30,
         'description': 'Intense glitch and noise effects'
     }
+})
+
+# Each preset's (effect_name, params) list, flattened once
+PRESET_EFFECTS: Mapping[str, Tuple[Tuple[str, Mapping[str, Any]], ...]] = MappingProxyType({
+    name: tuple(preset['params'].items())
+    for name, preset in ANIMATION_PRESETS.items()
+})
+
+def _make_validator(effect_name: str,
+                    effect_config: Dict[str, Dict[str, Any]]) -> Callable[[Dict[str, Any]], None]:
+    """
+    Build a validator for one effect with its parameter bounds captured.
+    
+    Args:
+        effect_name: Effect the validator checks
+        effect_config: The effect's entry in EFFECT_PARAMS
+        
+    Returns:
+        Function raising ValueError for unknown or out-of-range parameters
+    """
+    bounds = {
+        param_name: (constraints['min'], constraints['max'])
+        for param_name, constraints in effect_config.items()
+    }
+    
+    def validate(params: Dict[str, Any]) -> None:
+        for param_name, value in params.items():
+            if param_name not in bounds:
+                raise ValueError(f"Unknown parameter '{param_name}' for effect '{effect_name}'")
+                
+            lo, hi = bounds[param_name]
+            for v in (value if isinstance(value, (tuple, list)) else (value,)):
+                if not (lo <= v <= hi):
+                    raise ValueError(
+                        f"Value {v} for {effect_name}.{param_name} outside valid range "
+                        f"[{lo}, {hi}]"
+                    )
+                    
+    return validate
+
+# Per-effect validators, built once from EFFECT_PARAMS
+_VALIDATORS: Dict[str, Callable[[Dict[str, Any]], None]] = {
+    effect_name: _make_validator(effect_name, effect_config)
+    for effect_name, effect_config in EFFECT_PARAMS.items()
 }
 
 @dataclass
@@ -149,31 +202,13 @@ class EffectParameters:
     
     def validate(self) -> None:
         """Validate parameters against defined constraints."""
-        if self.name not in EFFECT_PARAMS:
+        validator = _VALIDATORS.get(self.name)
+        if validator is None:
             raise ValueError(f"Unknown effect: {self.name}")
-            
-        effect_config = EFFECT_PARAMS[self.name]
-        for param_name, value in self.params.items():
-            if param_name not in effect_config:
-                raise ValueError(f"Unknown parameter '{param_name}' for effect '{self.name}'")
-                
-            constraints = effect_config[param_name]
-            if isinstance(value, (tuple, list)):
-                for v in value:
-                    if not (constraints['min'] <= v <= constraints['max']):
-                        raise ValueError(
-                            f"Value {v} for {self.name}.{param_name} outside valid range "
-                            f"[{constraints['min']}, {constraints['max']}]"
-                        )
-            else:
-                if not (constraints['min'] <= value <= constraints['max']):
-                    raise ValueError(
-                        f"Value {value} for {self.name}.{param_name} outside valid range "
-                        f"[{constraints['min']}, {constraints['max']}]"
-                    )
+        validator(self.params)
     
-    def get_defaults(self) -> Dict[str, Any]:
-        """Get default parameters for the effect."""
+    def get_defaults(self) -> Mapping[str, Any]:
+        """Get default parameters for the effect (read-only)."""
         return EFFECT_DEFAULTS.get(self.name, {})
 
 def validate_preset(preset_name: str) -> None:
@@ -189,7 +224,6 @@ def validate_preset(preset_name: str) -> None:
     if preset_name not in ANIMATION_PRESETS:
         raise ValueError(f"Unknown preset: {preset_name}")
         
-    preset = ANIMATION_PRESETS[preset_name]
-    for effect_name, params in preset['params'].items():
+    for effect_name, params in PRESET_EFFECTS[preset_name]:
         effect = EffectParameters(effect_name, params)
         effect.validate()
\ No newline at end of file
@@ -1,10 +1,37 @@
-from typing import Dict, Any, List, Tuple, Optional, Union
+from typing import Dict, Any, List, Tuple, Optional, Union, Callable, Iterator
 from pathlib import Path
 from dataclasses import dataclass, field
 import logging
+import re
+import sys
 from config.config import ConfigManager
 
-@dataclass
+# Command syntax patterns, compiled once at import and shared by all parsers
+_PATTERNS: Dict[str, re.Pattern] = {
+    name: re.compile(pattern) for name, pattern in {
+        'effect': r'--(\w+)(?:\s+(\d*\.?\d+)|\s+\[([^\]]+)\])',
+        'animation': r'--(?:frames|fps)\s+(\d+)',
+        'ascii': r'--(?:cols|scale)\s+(\d*\.?\d+)',
+        'tag': r'#(\w+)',
+        'preset': r'--preset\s+(\w+)',
+        'output': r'--(?:format|quality)\s+(\w+)',
+        'random': r'--random'
+    }.items()
+}
+
+# Example invocations shown by the examples command
+_EXAMPLE_COMMANDS: Tuple[str, ...] = (
+    "!image --glitch 0.5 --chroma 0.3 #cyberpunk",
+    "!image --random --preset psychic",
+    "!animate --preset psychic --frames 30 --fps 24",
+    "!ascii --cols 120 --scale 0.5",
+    "!remix 123 --glitch [0.3,0.8] --chroma [0.2,0.4]"
+)
+
+# Slotted dataclasses need Python 3.10; older interpreters keep a __dict__
+_SLOTS: Dict[str, bool] = {'slots': True} if sys.version_info >= (3, 10) else {}
+
+@dataclass(**_SLOTS)
 class ParsedCommand:
     """Structured representation of a parsed command."""
     command: str = "image"  # Changed default from 'process' to 'image'
@@ -23,120 +50,44 @@ class CommandParser:
         self.config = config
         self.logger = logging.getLogger('CommandParser')
         
-        self.patterns = {
-            'effect': r'--(\w+)(?:\s+(\d*\.?\d+)|\s+\[([^\]]+)\])',
-            'animation': r'--(?:frames|fps)\s+(\d+)',
-            'ascii': r'--(?:cols|scale)\s+(\d*\.?\d+)',
-            'tag': r'#(\w+)',
-            'preset': r'--preset\s+(\w+)',
-            'output': r'--(?:format|quality)\s+(\w+)',
-            'random': r'--random'
-        }
+        self.patterns = _PATTERNS
+        
+        # Flag tables derived from config.effect_params, and the config
+        # version they were built from
+        self._flags_version: Optional[int] = None
+        self._refresh_flags()
+        # (config version, text) of the last format_help() result
+        self._help_cache: Optional[Tuple[int, str]] = None
+
+    def _refresh_flags(self) -> None:
+        """Rebuild the effect flag and handler tables after load_config."""
+        if self._flags_version == self.config.config_version:
+            return
+        self._effect_flags = {f'--{effect}': effect for effect in self.config.effect_params}
+        self._handlers = self._build_handlers()
+        self._flags_version = self.config.config_version
 
     def parse_command(self, command_str: str) -> ParsedCommand:
         """Parse command string into structured format."""
+        self._refresh_flags()
         result = ParsedCommand()
         parts = command_str.split()
         
         if parts and not parts[0].startswith('--'):
             result.command = parts.pop(0).lower()
         
-        i = 0
-        while i < len(parts):
-            part = parts[i]
-            
-            # Handle random flag
-            if part == '--random':
-                result.random = True
-                i += 1
-                continue
-                
-            # Handle preset
-            if part == '--preset' and i + 1 < len(parts):
-                preset_name = parts[i + 1]
-                try:
-                    preset = self.config.get_preset(preset_name)
-                    result.preset_name = preset_name
-                    result.effects.extend([
-                        (effect, params) 
-                        for effect, params in preset['params'].items()
-                    ])
-                    i += 2
-                    continue
-                except KeyError:
-                    raise ValueError(f"Unknown preset: {preset_name}")
-            
-            # Handle effects
-            if part.startswith('--') and part[2:] in self.config.effect_params:
-                effect_name = part[2:]
-                if i + 1 >= len(parts):
-                    raise ValueError(f"Missing value for effect: {effect_name}")
-                    
-                value = parts[i + 1]
-                if value.startswith('[') and value.endswith(']'):
-                    # Handle range values
-                    values = [float(x.strip()) for x in value[1:-1].split(',')]
-                    if len(values) != 2:
-                        raise ValueError(f"Invalid range for {effect_name}: {value}")
-                    params = {'intensity': tuple(values)}
-                else:
-                    # Handle single value
-                    params = {'intensity': float(value)}
-                
-                self.config.validate_params(effect_name, params)
-                result.effects.append((effect_name, params))
-                i += 2
-                continue
-            
-            # Handle animation parameters
-            if part in ['--frames', '--fps']:
-                param_name = part[2:]
-                if i + 1 >= len(parts):
-                    raise ValueError(f"Missing value for {param_name}")
-                value = int(parts[i + 1])
-                
-                if param_name == 'frames':
-                    if not (self.config.animation.min_frames <= value <= self.config.animation.max_frames):
-                        raise ValueError(f"Frames must be between {self.config.animation.min_frames} and {self.config.animation.max_frames}")
-                elif param_name == 'fps':
-                    if not (self.config.animation.min_fps <= value <= self.config.animation.max_fps):
-                        raise ValueError(f"FPS must be between {self.config.animation.min_fps} and {self.config.animation.max_fps}")
-                
-                result.animation_params[param_name] = value
-                i += 2
-                continue
-            
-            # Handle ASCII parameters
-            if part in ['--cols', '--scale']:
-                param_name = part[2:]
-                if i + 1 >= len(parts):
-                    raise ValueError(f"Missing value for {param_name}")
-                value = float(parts[i + 1])
-                
-                if param_name == 'cols':
-                    if not (0 < value <= self.config.ascii.max_cols):
-                        raise ValueError(f"Columns must be between 1 and {self.config.ascii.max_cols}")
-                elif param_name == 'scale':
-                    if not (0 < value <= 2.0):
-                        raise ValueError("Scale must be between 0 and 2.0")
-                
-                result.ascii_params[param_name] = value
-                i += 2
+        tokens = iter(parts)
+        for part in tokens:
+            # Flags are fixed literals, so one lookup finds the handler,
+            # which pulls its own value from the token stream
+            handler = self._handlers.get(part)
+            if handler is not None:
+                handler(part, tokens, result)
                 continue
             
             # Handle tags
             if part.startswith('#'):
                 result.tags.append(part[1:])
-                i += 1
-                continue
-            
-            # Handle output format
-            if part == '--format' and i + 1 < len(parts):
-                format_value = parts[i + 1].upper()
-                if format_value not in ['PNG', 'JPEG', 'GIF']:
-                    raise ValueError("Supported formats: PNG, JPEG, GIF")
-                result.output_params['format'] = format_value
-                i += 2
                 continue
             
             # Unknown parameter
@@ -145,6 +96,110 @@ class CommandParser:
         self._validate_command(result)
         return result
 
+    def _build_handlers(self) -> Dict[str, Callable[[str, Iterator[str], ParsedCommand], None]]:
+        """Map each flag literal to the method that parses it and its value."""
+        handlers = {
+            '--frames': self._handle_animation,
+            '--fps': self._handle_animation,
+            '--cols': self._handle_ascii,
+            '--scale': self._handle_ascii,
+            '--format': self._handle_format
+        }
+        handlers.update(dict.fromkeys(self._effect_flags, self._handle_effect))
+        handlers['--random'] = self._handle_random
+        handlers['--preset'] = self._handle_preset
+        return handlers
+
+    def _handle_random(self, flag: str, tokens: Iterator[str], result: ParsedCommand) -> None:
+        """Handle the --random flag."""
+        result.random = True
+
+    def _handle_preset(self, flag: str, tokens: Iterator[str], result: ParsedCommand) -> None:
+        """Expand --preset <name> into the preset's effects."""
+        preset_name = next(tokens, None)
+        if preset_name is None:
+            raise ValueError(f"Unknown parameter: {flag}")
+            
+        try:
+            preset = self.config.get_preset(preset_name)
+        except KeyError:
+            raise ValueError(f"Unknown preset: {preset_name}")
+            
+        result.preset_name = preset_name
+        result.effects.extend([
+            (effect, params) 
+            for effect, params in preset['params'].items()
+        ])
+
+    def _handle_effect(self, flag: str, tokens: Iterator[str], result: ParsedCommand) -> None:
+        """Handle --<effect> <value> or --<effect> [start,end]."""
+        effect_name = self._effect_flags[flag]
+        value = next(tokens, None)
+        if value is None:
+            raise ValueError(f"Missing value for effect: {effect_name}")
+            
+        # The value's kind is known here, so each scalar is checked directly
+        if value.startswith('[') and value.endswith(']'):
+            # Handle range values
+            values = [float(x.strip()) for x in value[1:-1].split(',')]
+            if len(values) != 2:
+                raise ValueError(f"Invalid range for {effect_name}: {value}")
+            for v in values:
+                self.config.validate_value(effect_name, 'intensity', v)
+            params = {'intensity': tuple(values)}
+        else:
+            # Handle single value
+            intensity = float(value)
+            self.config.validate_value(effect_name, 'intensity', intensity)
+            params = {'intensity': intensity}
+        
+        result.effects.append((effect_name, params))
+
+    def _handle_animation(self, flag: str, tokens: Iterator[str], result: ParsedCommand) -> None:
+        """Handle --frames and --fps."""
+        param_name = flag[2:]
+        value = next(tokens, None)
+        if value is None:
+            raise ValueError(f"Missing value for {param_name}")
+        value = int(value)
+        
+        if param_name == 'frames':
+            if not (self.config.animation.min_frames <= value <= self.config.animation.max_frames):
+                raise ValueError(f"Frames must be between {self.config.animation.min_frames} and {self.config.animation.max_frames}")
+        elif param_name == 'fps':
+            if not (self.config.animation.min_fps <= value <= self.config.animation.max_fps):
+                raise ValueError(f"FPS must be between {self.config.animation.min_fps} and {self.config.animation.max_fps}")
+        
+        result.animation_params[param_name] = value
+
+    def _handle_ascii(self, flag: str, tokens: Iterator[str], result: ParsedCommand) -> None:
+        """Handle --cols and --scale."""
+        param_name = flag[2:]
+        value = next(tokens, None)
+        if value is None:
+            raise ValueError(f"Missing value for {param_name}")
+        value = float(value)
+        
+        if param_name == 'cols':
+            if not (0 < value <= self.config.ascii.max_cols):
+                raise ValueError(f"Columns must be between 1 and {self.config.ascii.max_cols}")
+        elif param_name == 'scale':
+            if not (0 < value <= 2.0):
+                raise ValueError("Scale must be between 0 and 2.0")
+        
+        result.ascii_params[param_name] = value
+
+    def _handle_format(self, flag: str, tokens: Iterator[str], result: ParsedCommand) -> None:
+        """Handle --format <PNG|JPEG|GIF>."""
+        format_value = next(tokens, None)
+        if format_value is None:
+            raise ValueError(f"Unknown parameter: {flag}")
+            
+        format_value = format_value.upper()
+        if format_value not in ['PNG', 'JPEG', 'GIF']:
+            raise ValueError("Supported formats: PNG, JPEG, GIF")
+        result.output_params['format'] = format_value
+
     def _validate_command(self, parsed: ParsedCommand) -> None:
         """Validate parsed command for consistency."""
         if parsed.command not in ['image', 'animate', 'ascii', 'remix']:
@@ -159,7 +214,16 @@ class CommandParser:
             parsed.ascii_params['scale'] = self.config.ascii.default_scale
 
     def format_help(self) -> str:
-        """Generate help text for available commands."""
+        """
+        Generate help text for available commands.
+        
+        The text only depends on the configuration, so it is built once and
+        reused until load_config replaces the settings.
+        """
+        cached = self._help_cache
+        if cached is not None and cached[0] == self.config.config_version:
+            return cached[1]
+            
         help_text = [
             "Available Commands:",
             "  !image [options] - Process image with effects",
@@ -198,14 +262,10 @@ class CommandParser:
             "  #tag - Add tag to output"
         ])
         
-        return "\n".join(help_text)
+        text = "\n".join(help_text)
+        self._help_cache = (self.config.config_version, text)
+        return text
 
     def get_example_commands(self) -> List[str]:
         """Get list of example commands."""
-        return [
-            "!image --glitch 0.5 --chroma 0.3 #cyberpunk",
-            "!image --random --preset psychic",
-            "!animate --preset psychic --frames 30 --fps 24",
-            "!ascii --cols 120 --scale 0.5",
-            "!remix 123 --glitch [0.3,0.8] --chroma [0.2,0.4]"
-        ]
\ No newline at end of file
+        return list(_EXAMPLE_COMMANDS)
\ No newline at end of file
@@ -3,19 +3,86 @@ import sqlite3
 import json
 import logging
 from pathlib import Path
-from typing import Dict, Any, Optional, List, Union
+from typing import Dict, Any, Optional, List, Tuple, Union, Callable
 from io import BytesIO
+from collections import OrderedDict
+import copy
 import os
+import shutil
+import threading
+import time
 
 from core.image_processor import BaseImageProcessor
 from core.effect_processor import EffectProcessor
 from core.utils import ImageUtils
 
+try:
+    import orjson
+except ImportError:  # orjson is optional; the stdlib json module is the fallback
+    orjson = None
+
+# Tags live only in the tag_names/image_tags tables; reads rebuild each
+# image's list with this correlated subquery, in insertion order
+_TAG_SEPARATOR = '\x1f'
+_TAGS_COLUMN = f"""(
+    SELECT GROUP_CONCAT(name, '{_TAG_SEPARATOR}') FROM (
+        SELECT n.name FROM image_tags it
+        JOIN tag_names n ON n.id = it.tag_id
+        WHERE it.image_id = i.id
+        ORDER BY it.rowid
+    )
+)"""
+
+def _dumps(value: Any) -> str:
+    """Serialize metadata to JSON text, with orjson when available."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(value).decode()
+        except TypeError:
+            # orjson rejects float subclasses such as numpy scalars and
+            # non-string keys, both of which the json module accepts
+            pass
+    return json.dumps(value)
+
+# Deserialize metadata JSON text
+_loads: Callable[[Union[str, bytes]], Any] = orjson.loads if orjson is not None else json.loads
+
+def _split_tags(value: Optional[str]) -> List[str]:
+    """Turn a GROUP_CONCAT of tags back into a list."""
+    return value.split(_TAG_SEPARATOR) if value else []
+
+def _copy_record(record: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy a cached record, including its mutable tags and parameters."""
+    return {
+        **record,
+        'tags': list(record['tags']),
+        'parameters': copy.deepcopy(record['parameters'])
+    }
+
 class ImageRepository:
     """
     Manages storage and retrieval of processed images with metadata.
     """
     
+    # Bounds for the in-memory get_image cache
+    CACHE_SIZE = 32
+    CACHE_MAX_BYTES = 8 * 1024 * 1024
+    
+    # Image files are written through a 1 MiB buffer; encoders issue many
+    # small writes (PNG chunk headers) that would each be a syscall
+    WRITE_BUFFER_SIZE = 1024 * 1024
+    
+    # Per-connection settings: WAL lets readers proceed during writes and,
+    # with synchronous=NORMAL, commits no longer fsync every time
+    CONNECTION_PRAGMAS = (
+        "PRAGMA synchronous=NORMAL",
+        "PRAGMA busy_timeout=5000",
+        "PRAGMA temp_store=MEMORY",
+        "PRAGMA cache_size=-65536",
+        "PRAGMA foreign_keys=ON",
+        "PRAGMA wal_autocheckpoint=1000"
+    )
+    
     def __init__(self, db_path: Union[str, Path], storage_path: Union[str, Path]):
         """
         Initialize image repository.
@@ -27,19 +94,53 @@ class ImageRepository:
         self.logger = logging.getLogger('ImageRepository')
         self.db_path = Path(db_path)
         self.storage_path = Path(storage_path)
+        self._cache: OrderedDict[int, Dict[str, Any]] = OrderedDict()
         
         # Create storage directory if it doesn't exist
         self.storage_path.mkdir(parents=True, exist_ok=True)
         
+        # One long-lived connection shared by every call. Methods run on
+        # worker threads (asyncio.to_thread), so access is serialized by a
+        # lock rather than tied to the creating thread
+        self._lock = threading.Lock()
+        self._conn = self._connect()
+        
         # Initialize database
         self._init_db()
 
+    def _connect(self) -> sqlite3.Connection:
+        """
+        Open a database connection with the repository's pragmas applied.
+        
+        Returns:
+            Configured SQLite connection
+        """
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        for pragma in self.CONNECTION_PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    def close(self) -> None:
+        """Close the database connection. Safe to call more than once."""
+        conn = getattr(self, '_conn', None)
+        if conn is not None:
+            with self._lock:
+                conn.close()
+                self._conn = None
+
+    def __del__(self):
+        self.close()
+
     def _init_db(self) -> None:
         """Initialize SQLite database with required tables."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._lock, self._conn as conn:
                 cursor = conn.cursor()
                 
+                # The journal mode is stored in the database file, so
+                # setting it once here covers every later connection
+                cursor.execute("PRAGMA journal_mode=WAL")
+                
                 # Create images table
                 cursor.execute("""
                     CREATE TABLE IF NOT EXISTS images (
@@ -49,21 +150,80 @@ class ImageRepository:
                         creator_name TEXT NOT NULL,
                         created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                         file_path TEXT NOT NULL,
-                        tags TEXT,
-                        parameters TEXT
+                        parameters TEXT,
+                        source_image TEXT,
+                        content_hash TEXT
                     )
                 """)
                 
-                # Create tags table for efficient tag lookup
+                # Add columns introduced after the initial schema
+                cursor.execute("PRAGMA table_info(images)")
+                columns = {row[1] for row in cursor.fetchall()}
+                for column in ('source_image', 'content_hash'):
+                    if column not in columns:
+                        cursor.execute(f"ALTER TABLE images ADD COLUMN {column} TEXT")
+                
                 cursor.execute("""
-                    CREATE TABLE IF NOT EXISTS tags (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        image_id INTEGER,
-                        tag TEXT NOT NULL,
-                        FOREIGN KEY (image_id) REFERENCES images(id) ON DELETE CASCADE
+                    CREATE INDEX IF NOT EXISTS idx_images_content_hash
+                    ON images(content_hash)
+                """)
+                
+                # Each distinct tag is stored once; images link to tags by
+                # integer ID, so searches join on small indexed keys
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS tag_names (
+                        id INTEGER PRIMARY KEY,
+                        name TEXT NOT NULL UNIQUE
+                    )
+                """)
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS image_tags (
+                        image_id INTEGER NOT NULL,
+                        tag_id INTEGER NOT NULL,
+                        UNIQUE (image_id, tag_id),
+                        FOREIGN KEY (image_id) REFERENCES images(id) ON DELETE CASCADE,
+                        FOREIGN KEY (tag_id) REFERENCES tag_names(id)
                     )
                 """)
                 
+                # Move rows from the former one-row-per-tag table. Old
+                # databases never enforced its foreign key, so rows of deleted
+                # images are skipped; OR IGNORE does not cover FK violations
+                cursor.execute("""
+                    SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'tags'
+                """)
+                if cursor.fetchone():
+                    cursor.execute("""
+                        INSERT OR IGNORE INTO tag_names (name)
+                        SELECT tag FROM tags
+                        WHERE image_id IN (SELECT id FROM images)
+                        ORDER BY id
+                    """)
+                    cursor.execute("""
+                        INSERT OR IGNORE INTO image_tags (image_id, tag_id)
+                        SELECT t.image_id, n.id FROM tags t
+                        JOIN tag_names n ON n.name = t.tag
+                        WHERE t.image_id IN (SELECT id FROM images)
+                        ORDER BY t.id
+                    """)
+                    cursor.execute("DROP TABLE tags")
+                
+                # Indexes for tag search, per-creator lookups and newest-first
+                # listing; the UNIQUE constraint above indexes image_tags by
+                # image for reads and the ON DELETE CASCADE
+                cursor.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_image_tags_tag
+                    ON image_tags(tag_id, image_id)
+                """)
+                cursor.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_images_creator
+                    ON images(creator_id)
+                """)
+                cursor.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_images_created_at
+                    ON images(created_at DESC)
+                """)
+                
                 conn.commit()
                 
         except sqlite3.Error as e:
@@ -71,72 +231,47 @@ class ImageRepository:
             raise
 
     def store_image(self,
-                   image: Union[Image.Image, bytes, BytesIO],
+                   image: Union[Image.Image, bytes, BytesIO, str, Path],
                    title: str,
                    creator_id: str,
                    creator_name: str,
                    tags: Optional[List[str]] = None,
-                   parameters: Optional[Dict[str, Any]] = None) -> int:
+                   parameters: Optional[Dict[str, Any]] = None,
+                   source_image: Optional[str] = None,
+                   content_hash: Optional[str] = None,
+                   suffix: Optional[str] = None) -> int:
         """
         Store image with metadata.
         
         Args:
-            image: Image to store
+            image: Image to store, or path to an existing file to copy in
             title: Image title
             creator_id: Creator's unique identifier
             creator_name: Creator's display name
             tags: Optional list of tags
             parameters: Optional effect parameters used
+            source_image: Optional description of the input image
+            content_hash: Optional key of the input and effects that produced
+                the image, used by get_by_content_hash
+            suffix: Optional file extension (e.g. '.mp4') of encoded data;
+                by default copied files keep theirs and anything else is PNG
             
         Returns:
             ID of stored image record
         """
         try:
-            # Convert image to bytes if necessary
-            if isinstance(image, Image.Image):
-                img_bytes = BytesIO()
-                image.save(img_bytes, format='PNG')
-                img_bytes = img_bytes.getvalue()
-            elif isinstance(image, BytesIO):
-                img_bytes = image.getvalue()
-            else:
-                img_bytes = image
-            
-            # Generate unique filename
-            filename = f"{title}_{creator_id}_{int(time.time())}.png"
-            file_path = self.storage_path / filename
-            
-            # Save image file
-            with open(file_path, 'wb') as f:
-                f.write(img_bytes)
+            file_path = self._write_image_file(
+                image, f"{title}_{creator_id}_{int(time.time())}", suffix
+            )
             
             # Store metadata in database
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                
-                # Insert image record
-                cursor.execute("""
-                    INSERT INTO images (title, creator_id, creator_name, file_path, tags, parameters)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                """, (
-                    title,
-                    creator_id,
-                    creator_name,
-                    str(file_path),
-                    json.dumps(tags or []),
-                    json.dumps(parameters or {})
-                ))
-                
-                image_id = cursor.lastrowid
-                
-                # Store tags
-                if tags:
-                    cursor.executemany("""
-                        INSERT INTO tags (image_id, tag)
-                        VALUES (?, ?)
-                    """, [(image_id, tag) for tag in tags])
-                
-                conn.commit()
+            with self._lock, self._conn as conn:
+                image_id, = self._insert_records(conn.cursor(), [(
+                    (title, creator_id, creator_name, str(file_path),
+                     _dumps(parameters or {}),
+                     source_image, content_hash),
+                    tags or []
+                )])
                 
             return image_id
             
@@ -144,53 +279,217 @@ class ImageRepository:
             self.logger.error(f"Error storing image: {e}")
             raise
 
-    def get_image(self, image_id: int) -> Optional[Dict[str, Any]]:
+    def _write_image_file(self,
+                          image: Union[Image.Image, bytes, BytesIO, str, Path],
+                          stem: str,
+                          suffix: Optional[str] = None) -> Path:
+        """
+        Write an image into the storage directory.
+        
+        Args:
+            image: Image to store, or path to an existing file to copy in
+            stem: Filename without extension
+            suffix: File extension; defaults to the copied file's own, or
+                '.png' for images and encoded data
+            
+        Returns:
+            Path of the stored file
+        """
+        if suffix is None:
+            # Keep the extension of copied files
+            suffix = Path(image).suffix if isinstance(image, (str, Path)) else '.png'
+        file_path = self.storage_path / f"{stem}{suffix}"
+        
+        if isinstance(image, (str, Path)):
+            # Copy on disk without loading the whole file into memory
+            shutil.copyfile(image, file_path)
+        else:
+            # Encode or write straight into the file, without first copying
+            # the whole encoded image into a separate bytes object
+            with open(file_path, 'wb', buffering=self.WRITE_BUFFER_SIZE) as f:
+                if isinstance(image, Image.Image):
+                    image.save(f, format=Image.registered_extensions().get(suffix.lower(), 'PNG'))
+                elif isinstance(image, BytesIO):
+                    f.write(image.getbuffer())
+                else:
+                    f.write(image)
+                
+        return file_path
+
+    @staticmethod
+    def _insert_records(cursor: sqlite3.Cursor,
+                        rows: List[Tuple[Tuple[Any, ...], List[str]]]) -> List[int]:
+        """
+        Insert image rows and their tags within the caller's transaction.
+        
+        Args:
+            cursor: Cursor of the locked connection
+            rows: (images column values, tags) pairs
+            
+        Returns:
+            IDs of the inserted image records
+        """
+        image_ids = []
+        for values, _ in rows:
+            cursor.execute("""
+                INSERT INTO images (title, creator_id, creator_name, file_path, parameters,
+                                    source_image, content_hash)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, values)
+            image_ids.append(cursor.lastrowid)
+            
+        ImageRepository._insert_tags(cursor, [
+            (image_id, tag)
+            for image_id, (_, tags) in zip(image_ids, rows)
+            for tag in tags
+        ])
+        return image_ids
+
+    @staticmethod
+    def _insert_tags(cursor: sqlite3.Cursor, pairs: List[Tuple[int, str]]) -> None:
+        """
+        Link (image_id, tag) pairs within the caller's transaction.
+        
+        New names are registered first, then each image is linked to the
+        tag IDs; pairs already linked are skipped.
+        """
+        cursor.executemany("""
+            INSERT OR IGNORE INTO tag_names (name)
+            VALUES (?)
+        """, [(tag,) for _, tag in pairs])
+        cursor.executemany("""
+            INSERT OR IGNORE INTO image_tags (image_id, tag_id)
+            SELECT ?, id FROM tag_names WHERE name = ?
+        """, pairs)
+
+    def get_image(self, image_id: int, load_image: bool = True) -> Optional[Dict[str, Any]]:
         """
         Retrieve image and metadata by ID.
         
         Args:
             image_id: Image record ID
+            load_image: Read the file into the record's 'image' bytes; pass
+                False when only 'file_path' is needed, e.g. to send the file
+                straight from disk
             
         Returns:
             Dictionary containing image data and metadata
         """
+        # The cache is shared by worker threads, so it is only touched
+        # under the connection lock
+        with self._lock:
+            cached = self._cache.get(image_id)
+            if cached is not None:
+                self._cache.move_to_end(image_id)
+        if cached is not None:
+            return _copy_record(cached)
+            
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._lock, self._conn as conn:
                 cursor = conn.cursor()
                 
-                cursor.execute("""
-                    SELECT id, title, creator_id, creator_name, created_at, file_path, tags, parameters
-                    FROM images WHERE id = ?
+                cursor.execute(f"""
+                    SELECT i.id, i.title, i.creator_id, i.creator_name, i.created_at, i.file_path,
+                           {_TAGS_COLUMN}, i.parameters
+                    FROM images i WHERE i.id = ?
                 """, (image_id,))
                 
                 row = cursor.fetchone()
-                if not row:
-                    return None
-                    
-                # Load image file
-                file_path = Path(row[5])
-                if not file_path.exists():
-                    self.logger.error(f"Image file not found: {file_path}")
-                    return None
-                    
-                with open(file_path, 'rb') as f:
-                    image_data = f.read()
                 
-                return {
-                    'id': row[0],
-                    'title': row[1],
-                    'creator_id': row[2],
-                    'creator_name': row[3],
-                    'created_at': row[4],
-                    'image': image_data,
-                    'tags': json.loads(row[6]),
-                    'parameters': json.loads(row[7])
-                }
+            if not row:
+                return None
+                
+            # Load image file outside the lock so other queries can proceed
+            file_path = Path(row[5])
+            if not file_path.exists():
+                self.logger.error(f"Image file not found: {file_path}")
+                return None
+                
+            record = {
+                'id': row[0],
+                'title': row[1],
+                'creator_id': row[2],
+                'creator_name': row[3],
+                'created_at': row[4],
+                'file_path': file_path,
+                'tags': _split_tags(row[6]),
+                'parameters': _loads(row[7])
+            }
+            if not load_image:
+                return record
+                
+            with open(file_path, 'rb') as f:
+                image_data = f.read()
+            record['image'] = image_data
+                
+            # Keep recently used records in memory, skipping large files;
+            # callers get copies so their changes never reach the cache
+            if len(image_data) <= self.CACHE_MAX_BYTES:
+                with self._lock:
+                    self._cache[image_id] = record
+                    if len(self._cache) > self.CACHE_SIZE:
+                        self._cache.popitem(last=False)
+                return _copy_record(record)
+                    
+            return record
                 
         except Exception as e:
             self.logger.error(f"Error retrieving image: {e}")
             return None
 
+    def get_by_content_hash(self, content_hash: str,
+                            load_image: bool = True) -> Optional[Dict[str, Any]]:
+        """
+        Retrieve the most recent image stored under a content hash.
+        
+        Args:
+            content_hash: Key passed to store_image
+            load_image: As for get_image
+            
+        Returns:
+            Dictionary containing image data and metadata, or None if not found
+        """
+        try:
+            with self._lock, self._conn as conn:
+                cursor = conn.cursor()
+                cursor.execute("""
+                    SELECT id FROM images
+                    WHERE content_hash = ?
+                    ORDER BY id DESC LIMIT 1
+                """, (content_hash,))
+                row = cursor.fetchone()
+                
+            return self.get_image(row[0], load_image) if row else None
+                
+        except Exception as e:
+            self.logger.error(f"Error retrieving image by hash: {e}")
+            return None
+
+    def add_tags(self, image_id: int, tags: List[str]) -> bool:
+        """
+        Add tags to a stored image.
+        
+        Args:
+            image_id: Image record ID
+            tags: Tags to add; ones the image already has are ignored
+            
+        Returns:
+            True if the image exists, False otherwise
+        """
+        try:
+            with self._lock, self._conn as conn:
+                self._cache.pop(image_id, None)
+                cursor = conn.cursor()
+                cursor.execute("SELECT 1 FROM images WHERE id = ?", (image_id,))
+                if not cursor.fetchone():
+                    return False
+                self._insert_tags(cursor, [(image_id, tag) for tag in tags])
+                return True
+                
+        except Exception as e:
+            self.logger.error(f"Error adding tags: {e}")
+            return False
+
     def search_by_tags(self, tags: List[str]) -> List[Dict[str, Any]]:
         """
         Search for images by tags.
@@ -202,16 +501,20 @@ class ImageRepository:
             List of matching image records
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._lock, self._conn as conn:
                 cursor = conn.cursor()
                 
                 # Build query to match any of the provided tags
                 placeholders = ','.join('?' * len(tags))
                 cursor.execute(f"""
-                    SELECT DISTINCT i.*
+                    SELECT i.id, i.title, i.creator_id, i.creator_name, i.created_at, i.file_path,
+                           {_TAGS_COLUMN}, i.parameters
                     FROM images i
-                    JOIN tags t ON i.id = t.image_id
-                    WHERE t.tag IN ({placeholders})
+                    WHERE i.id IN (
+                        SELECT it.image_id FROM image_tags it
+                        JOIN tag_names n ON n.id = it.tag_id
+                        WHERE n.name IN ({placeholders})
+                    )
                     ORDER BY i.created_at DESC
                 """, tags)
                 
@@ -223,8 +526,8 @@ class ImageRepository:
                         'creator_id': row[2],
                         'creator_name': row[3],
                         'created_at': row[4],
-                        'tags': json.loads(row[6]),
-                        'parameters': json.loads(row[7])
+                        'tags': _split_tags(row[6]),
+                        'parameters': _loads(row[7])
                     })
                 
                 return results
@@ -244,7 +547,8 @@ class ImageRepository:
             True if successful, False otherwise
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._lock, self._conn as conn:
+                self._cache.pop(image_id, None)
                 cursor = conn.cursor()
                 
                 # Get file path before deleting record
@@ -278,17 +582,21 @@ class ImageRepository:
         """
         try:
             # Get all file paths from database
-            with sqlite3.connect(self.db_path) as conn:
+            with self._lock, self._conn as conn:
                 cursor = conn.cursor()
                 cursor.execute("SELECT file_path FROM images")
-                db_files = {Path(row[0]) for row in cursor.fetchall()}
+                # Compare plain absolute path strings rather than Path objects
+                db_files = {os.path.abspath(row[0]) for row in cursor.fetchall()}
             
-            # Check actual files in storage directory
+            # Check actual files in storage directory; scandir entries carry
+            # their file type, so no extra stat call is needed per file
+            storage_dir = os.path.abspath(self.storage_path)
             cleaned = 0
-            for file_path in self.storage_path.glob('*'):
-                if file_path.is_file() and file_path not in db_files:
-                    file_path.unlink()
-                    cleaned += 1
+            with os.scandir(storage_dir) as entries:
+                for entry in entries:
+                    if entry.is_file() and entry.path not in db_files:
+                        os.unlink(entry.path)
+                        cleaned += 1
             
             return cleaned
             
@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+from PIL import Image, ImageDraw, ImageEnhance
+
+from core.ascii_processor import ASCIIProcessor
+
+
+@pytest.fixture
+def processor():
+    return ASCIIProcessor()
+
+
+@pytest.fixture
+def ascii_lines(processor):
+    rng = np.random.default_rng(0)
+    chars = np.array(list(processor.detailed_chars))
+    return ["".join(rng.choice(chars, 60)) for _ in range(20)]
+
+
+def expected_frame(processor, ascii_lines, bg_color, text_color):
+    """Reference: the frame drawn glyph row by glyph row, then ImageEnhance.Contrast"""
+    width = len(ascii_lines[0]) * processor.char_width + 40
+    height = len(ascii_lines) * processor.char_height * 1.2 + 40
+    image = Image.new("RGB", (int(width), int(height)), color=bg_color)
+    draw = ImageDraw.Draw(image)
+    for y, line in enumerate(ascii_lines):
+        draw.text((20, 20 + y * processor.char_height * 1.2), line, fill=text_color, font=processor.font)
+    return ImageEnhance.Contrast(image).enhance(1.2)
+
+
+@pytest.mark.parametrize("bg_color,text_color", [
+    ("black", "white"),
+    ((20, 20, 20), "white"),
+    ((200, 30, 90), (10, 250, 120)),
+])
+def test_frame_contrast_matches_image_enhance(processor, ascii_lines, bg_color, text_color):
+    frame = processor.create_frame_image(ascii_lines, bg_color=bg_color, text_color=text_color)
+    expected = expected_frame(processor, ascii_lines, bg_color, text_color)
+
+    assert frame.size == expected.size
+    assert np.array_equal(np.asarray(frame), np.asarray(expected))
@@ -0,0 +1,95 @@
+import asyncio
+
+import pytest
+from PIL import Image
+
+from storage.repository import ImageRepository
+
+
+class FakeContext:
+    """Command context that records what the bot sends"""
+
+    class Author:
+        id = 1
+        name = "user"
+
+    class Message:
+        attachments = []
+        content = "!image"
+
+    def __init__(self):
+        self.author = self.Author()
+        self.message = self.Message()
+        self.sent = []
+
+    async def send(self, content=None, file=None, files=None):
+        files = files or ([file] if file else [])
+        self.sent.append((content, [f.filename for f in files]))
+
+
+@pytest.fixture
+def bot(tmp_path, monkeypatch):
+    """The bot module running against a fresh repository and input.png"""
+    monkeypatch.chdir(tmp_path)
+    import bot as bot_module
+
+    repository = ImageRepository(tmp_path / "images.db", tmp_path / "storage")
+    monkeypatch.setattr(bot_module, "repository", repository)
+    Image.new("RGB", (32, 32), "red").save(tmp_path / "input.png")
+
+    renders = []
+    run_heavy = bot_module._run_heavy
+
+    async def counting_run_heavy(ctx, func, *args):
+        renders.append(func)
+        return await run_heavy(ctx, func, *args)
+
+    monkeypatch.setattr(bot_module, "_run_heavy", counting_run_heavy)
+    bot_module.renders = renders
+    yield bot_module
+    repository.close()
+
+
+def dispatch(bot, *args, kind="image", image_id=None):
+    ctx = FakeContext()
+    asyncio.run(bot._dispatch(ctx, kind, args, image_id=image_id))
+    return ctx.sent
+
+
+def test_dedup_hit_reports_id_and_keeps_tags(bot):
+    first = dispatch(bot, "--energy", "0.5", "#first")
+    assert first == [("Image stored with ID: 1", ["processed.png"])]
+
+    second = dispatch(bot, "--energy", "0.5", "#second")
+    assert second == [("Image stored with ID: 1", ["processed.png"])]
+    assert len(bot.renders) == 1
+    assert bot.repository.get_image(1, load_image=False)["tags"] == ["first", "second"]
+
+
+def test_dedup_miss_renders_changed_effects(bot):
+    dispatch(bot, "--energy", "0.5", "#a")
+    sent = dispatch(bot, "--energy", "0.6", "#a")
+    assert sent == [("Image stored with ID: 2", ["processed.png"])]
+    assert len(bot.renders) == 2
+
+
+def test_random_effects_are_rendered_every_time(bot):
+    dispatch(bot, "--glitch", "0.5", "#a")
+    sent = dispatch(bot, "--glitch", "0.5", "#a")
+    assert sent == [("Image stored with ID: 2", ["processed.png"])]
+    assert len(bot.renders) == 2
+
+
+def test_remix_is_stored_with_its_own_effects(bot):
+    dispatch(bot, "--energy", "0.5", "#base")
+    sent = dispatch(bot, "--pulse", "0.2", "#mix", kind="remix", image_id=1)
+    assert sent == [("Remixed image stored with ID: 2", ["remixed.png"])]
+
+    record = bot.repository.get_image(2, load_image=False)
+    assert record["tags"] == ["mix", "remixed"]
+    assert record["parameters"] == {"pulse": {"intensity": 0.2}}
+
+
+def test_remix_of_unknown_image(bot):
+    assert dispatch(bot, kind="remix", image_id=99) == [("Image with ID 99 not found", [])]
+    assert bot.renders == []
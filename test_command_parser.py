@@ -0,0 +1,61 @@
+import pytest
+
+from config.config import ConfigManager
+from interface.command_parser import CommandParser
+
+
+@pytest.fixture
+def config(tmp_path):
+    return ConfigManager(config_dir=tmp_path)
+
+
+@pytest.fixture
+def parser(config):
+    return CommandParser(config)
+
+
+def test_reloaded_effect_params_change_accepted_flags(config, parser):
+    """Flags follow effect_params after load_config, not the cached parse"""
+    assert parser.parse_command("image --glitch 0.5").effects == [("glitch", {"intensity": 0.5})]
+
+    config.effect_params.pop("glitch")
+    config.effect_params["warp"] = {
+        "intensity": {"min": 0.0, "max": 1.0, "default": 0.5},
+        "type": float,
+        "description": "Warp effect intensity"
+    }
+    config.save_config()
+    config.load_config()
+
+    with pytest.raises(ValueError, match="Unknown parameter: --glitch"):
+        parser.parse_command("image --glitch 0.5")
+    assert parser.parse_command("image --warp 0.25").effects == [("warp", {"intensity": 0.25})]
+
+
+def test_saved_preset_is_used_by_next_parse(config, parser):
+    config.save_preset("soft", {"noise": {"intensity": 0.1}})
+    assert parser.parse_command("image --preset soft").effects == [("noise", {"intensity": 0.1})]
+
+    config.save_preset("soft", {"noise": {"intensity": 0.2}})
+    assert parser.parse_command("image --preset soft").effects == [("noise", {"intensity": 0.2})]
+
+
+def test_parsed_commands_are_independent(parser):
+    first = parser.parse_command("image --glitch 0.5 #tag")
+    first.effects.append(("noise", {"intensity": 0.1}))
+    first.tags.append("other")
+
+    second = parser.parse_command("image --glitch 0.5 #tag")
+    assert second.effects == [("glitch", {"intensity": 0.5})]
+    assert second.tags == ["tag"]
+
+
+@pytest.mark.parametrize("params,message", [
+    ({"intensity": 1.5}, r"Value 1.5 for glitch.intensity outside valid range \[0.0, 1.0\]"),
+    ({"intensity": (0.2, -1)}, r"Value -1 for glitch.intensity"),
+    ({"speed": 0.5}, "Unknown parameter 'speed' for effect 'glitch'"),
+])
+def test_validate_params_reports_first_bad_value(config, params, message):
+    config.validate_params("glitch", {"intensity": 0.5})
+    with pytest.raises(ValueError, match=message):
+        config.validate_params("glitch", params)
@@ -0,0 +1,174 @@
+import numpy as np
+import pytest
+from PIL import Image, ImageFilter
+
+from core import utils
+from core.effect_processor import EffectProcessor, _chroma_kernel
+from effects import advanced_effects
+from effects.advanced_effects import apply_energy_effect, apply_glitch_effect
+
+
+@pytest.fixture
+def rgb_image():
+    rng = np.random.default_rng(0)
+    return Image.fromarray(rng.integers(0, 256, (40, 60, 3), dtype=np.uint8))
+
+
+def expected_noise(image, intensity, seed):
+    noise = np.random.default_rng(seed).standard_normal((image.height, image.width, 3), dtype=np.float32)
+    noise *= intensity * 50
+    noise += np.asarray(image)
+    return np.clip(noise, 0, 255).astype(np.uint8)
+
+
+def test_noise_draws_from_processor_generator(rgb_image):
+    """Seeded noise is reproducible on both the single and batch paths"""
+    expected = expected_noise(rgb_image, 0.4, seed=7)
+
+    single = EffectProcessor(rgb_image)
+    single._rng = np.random.default_rng(7)
+    single.apply_noise(0.4)
+    assert np.array_equal(np.asarray(single.current_image), expected)
+
+    batch = EffectProcessor(rgb_image)
+    batch._rng = np.random.default_rng(7)
+    batch.apply_effects_batch([("noise", {"intensity": 0.4})])
+    assert np.array_equal(np.asarray(batch.current_image), expected)
+
+
+def sequential_glitch(arr, intensity, seed, color_shift):
+    """Reference: the draws of the glitch effect applied one line at a time"""
+    np.random.seed(seed)
+    height = arr.shape[0]
+    num_lines = int(intensity * height * 0.1)
+    max_offset = int(intensity * 20)
+    ys = np.random.randint(0, height - 1, num_lines)
+    offsets = np.random.randint(-max_offset, max_offset, num_lines)
+    assert len(np.unique(ys)) < num_lines, "seed must repeat a row"
+
+    arr = arr.copy()
+    for y, offset in zip(ys, offsets):
+        arr[y] = np.roll(arr[y], offset, axis=0)
+    if color_shift:
+        shifted = np.random.random(num_lines) < 0.3
+        channels = np.random.randint(0, 3, np.count_nonzero(shifted))
+        for y, offset, channel in zip(ys[shifted], offsets[shifted], channels):
+            arr[y, :, channel] = np.roll(arr[y, :, channel], offset * 2)
+    return arr
+
+
+@pytest.fixture
+def tall_image():
+    rng = np.random.default_rng(1)
+    return Image.fromarray(rng.integers(0, 256, (400, 50, 3), dtype=np.uint8))
+
+
+@pytest.mark.parametrize("intensity", [0.5, 0.9])
+def test_glitch_effect_stacks_repeated_rows(tall_image, intensity):
+    """Rows picked twice are shifted twice, whichever backend runs"""
+    expected = sequential_glitch(np.asarray(tall_image), intensity, 2, intensity > 0.7)
+    result = apply_glitch_effect(tall_image, intensity, seed=2)
+    assert np.array_equal(np.asarray(result), expected)
+
+
+def generator_glitch(arr, intensity, seed):
+    """Reference: the processor's glitch drawn from a seeded generator, one line at a time"""
+    rng = np.random.default_rng(seed)
+    height = arr.shape[0]
+    num_lines = int(intensity * height * 0.1)
+    max_offset = int(intensity * 20)
+    ys = rng.integers(0, height - 1, num_lines)
+    offsets = rng.integers(-max_offset, max_offset, num_lines)
+    assert len(np.unique(ys)) < num_lines, "seed must repeat a row"
+
+    arr = arr.copy()
+    for y, offset in zip(ys, offsets):
+        arr[y] = np.roll(arr[y], offset, axis=0)
+    return arr
+
+
+def test_processor_glitch_stacks_repeated_rows(tall_image):
+    """Both processor paths draw from the seeded generator and stack repeated rows"""
+    expected = generator_glitch(np.asarray(tall_image), 0.5, 2)
+
+    single = EffectProcessor(tall_image)
+    single.seed(2)
+    single.apply_glitch(0.5)
+    assert np.array_equal(np.asarray(single.current_image), expected)
+
+    batch = EffectProcessor(tall_image)
+    batch.seed(2)
+    batch.apply_effects_batch([("glitch", {"intensity": 0.5})])
+    assert np.array_equal(np.asarray(batch.current_image), expected)
+
+
+def test_glitch_numba_rows_match_numpy_gather():
+    pytest.importorskip("numba")
+    rng = np.random.default_rng(2)
+    arr = rng.integers(0, 256, (30, 40, 4), dtype=np.uint8)
+    rows = np.array([1, 5, 9])
+    shifts = rng.integers(-50, 50, (3, 4))
+
+    columns = (np.arange(40)[:, None] - shifts[:, None, :]) % 40
+    expected = arr.copy()
+    expected[rows] = np.take_along_axis(arr[rows], columns, axis=1)
+    advanced_effects._glitch_rows_jit(arr, rows, shifts)
+    assert np.array_equal(arr, expected)
+
+
+def expected_energy(image, intensity):
+    arr = np.asarray(image)
+    x, y = np.meshgrid(np.arange(arr.shape[1]), np.arange(arr.shape[0]))
+    distortion = np.sin(x * 0.1 + y * 0.1) * intensity * 30
+    return np.clip(arr + distortion[:, :, None], 0, 255).astype(np.uint8)
+
+
+@pytest.mark.parametrize("intensity", [0.5, 0.50004, 0.123456])
+def test_energy_uses_exact_intensity(rgb_image, intensity):
+    """The displacement map is scaled by the unrounded intensity"""
+    expected = expected_energy(rgb_image, intensity)
+
+    single = EffectProcessor(rgb_image)
+    single.apply_energy_effect(intensity)
+    assert np.array_equal(np.asarray(single.current_image), expected)
+
+    batch = EffectProcessor(rgb_image)
+    batch.apply_effects_batch([("energy", {"intensity": intensity})])
+    assert np.array_equal(np.asarray(batch.current_image), expected)
+
+
+@pytest.mark.parametrize("intensity", [0.5, 0.50004])
+def test_energy_effect_uses_exact_intensity(rgb_image, intensity):
+    result = apply_energy_effect(rgb_image, intensity)
+    assert np.array_equal(np.asarray(result), expected_energy(rgb_image, intensity))
+
+
+def per_channel_chroma(arr, max_offset):
+    """Reference: red and blue shifted and blurred one channel at a time by Pillow"""
+    expected = arr.copy()
+    for c, shift in ((0, -max_offset), (2, max_offset)):
+        shifted = Image.fromarray(np.roll(arr[..., c], shift, axis=1))
+        expected[..., c] = shifted.filter(ImageFilter.GaussianBlur(0.5))
+    return expected
+
+
+def test_chroma_matches_pillow_without_opencv(rgb_image, monkeypatch):
+    monkeypatch.setattr(utils, "cv2", None)
+    arr = np.array(rgb_image)
+    expected = per_channel_chroma(arr, 5)
+    _chroma_kernel(arr, 5)
+    assert np.array_equal(arr, expected)
+
+
+def test_chroma_opencv_blur_tolerance(rgb_image):
+    """OpenCV's true Gaussian differs from Pillow's box approximation on noisy input"""
+    if utils.cv2 is None:
+        pytest.skip("OpenCV not installed")
+    arr = np.array(rgb_image)
+    expected = per_channel_chroma(arr, 5)
+    _chroma_kernel(arr, 5)
+
+    diff = np.abs(arr.astype(np.int16) - expected)
+    assert not diff[..., 1].any()
+    assert diff.max() <= 5
+    assert diff[..., [0, 2]].mean() < 1.5
@@ -0,0 +1,163 @@
+import sqlite3
+import threading
+
+import pytest
+from PIL import Image
+
+from storage.repository import ImageRepository
+
+
+def create_legacy_db(db_path):
+    """Create a database with the original images/tags schema"""
+    conn = sqlite3.connect(db_path)
+    conn.executescript("""
+        CREATE TABLE images (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title TEXT NOT NULL,
+            creator_id TEXT NOT NULL,
+            creator_name TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            file_path TEXT NOT NULL,
+            tags TEXT,
+            parameters TEXT
+        );
+        CREATE TABLE tags (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            image_id INTEGER,
+            tag TEXT NOT NULL,
+            FOREIGN KEY (image_id) REFERENCES images(id) ON DELETE CASCADE
+        );
+    """)
+    return conn
+
+
+@pytest.fixture
+def repo(tmp_path):
+    repository = ImageRepository(tmp_path / "images.db", tmp_path / "storage")
+    yield repository
+    repository.close()
+
+
+def test_migration_skips_orphaned_tags(tmp_path):
+    """Legacy tag rows of deleted images must not block startup"""
+    db_path = tmp_path / "legacy.db"
+    image_path = tmp_path / "legacy.png"
+    Image.new("RGB", (4, 4), "red").save(image_path)
+
+    conn = create_legacy_db(db_path)
+    conn.execute(
+        "INSERT INTO images (title, creator_id, creator_name, file_path, tags, parameters) "
+        "VALUES ('old', '1', 'user', ?, '[\"neon\", \"retro\"]', '{}')",
+        (str(image_path),)
+    )
+    conn.executemany(
+        "INSERT INTO tags (image_id, tag) VALUES (?, ?)",
+        [(1, "neon"), (1, "retro"), (99, "orphan")]
+    )
+    conn.commit()
+    conn.close()
+
+    repository = ImageRepository(db_path, tmp_path / "storage")
+    try:
+        assert [r["id"] for r in repository.search_by_tags(["neon"])] == [1]
+        assert repository.search_by_tags(["orphan"]) == []
+        assert repository.get_image(1, load_image=False)["tags"] == ["neon", "retro"]
+
+        with sqlite3.connect(db_path) as check:
+            tables = {row[0] for row in check.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+            names = {row[0] for row in check.execute("SELECT name FROM tag_names")}
+        assert "tags" not in tables
+        assert names == {"neon", "retro"}
+    finally:
+        repository.close()
+
+
+def test_store_keeps_requested_suffix(repo):
+    """Encoded non-PNG output is stored under its own extension"""
+    video_id = repo.store_image(b"\x00\x00\x00\x18ftypmp42", "clip", "1", "user", suffix=".mp4")
+    image_id = repo.store_image(Image.new("RGB", (4, 4)), "still", "1", "user")
+
+    assert repo.get_image(video_id, load_image=False)["file_path"].suffix == ".mp4"
+    assert repo.get_image(image_id, load_image=False)["file_path"].suffix == ".png"
+
+
+def test_content_hash_returns_latest(repo):
+    """Dedup lookups find the newest image stored under a key"""
+    image = Image.new("RGB", (8, 8), "blue")
+    repo.store_image(image, "first", "1", "user", tags=["a"], content_hash="key")
+    latest = repo.store_image(image, "second", "1", "user", tags=["b"], content_hash="key")
+    repo.store_image(image, "other", "1", "user", content_hash="different")
+
+    record = repo.get_by_content_hash("key", load_image=False)
+    assert record["id"] == latest
+    assert record["tags"] == ["b"]
+    assert "image" not in record
+    assert record["file_path"].exists()
+    assert repo.get_by_content_hash("missing") is None
+
+
+def test_cached_records_are_isolated(repo):
+    """Changing a returned record must not alter later reads"""
+    image_id = repo.store_image(
+        Image.new("RGB", (8, 8)), "cached", "1", "user",
+        tags=["x"], parameters={"glitch": {"intensity": 0.5}}
+    )
+    first = repo.get_image(image_id)
+    first["tags"].append("y")
+    first["parameters"]["glitch"]["intensity"] = 1.0
+
+    second = repo.get_image(image_id)
+    assert second["tags"] == ["x"]
+    assert second["parameters"] == {"glitch": {"intensity": 0.5}}
+
+
+def test_delete_removes_tags_and_cache(repo):
+    image_id = repo.store_image(Image.new("RGB", (8, 8)), "gone", "1", "user", tags=["t"])
+    assert repo.get_image(image_id) is not None
+
+    assert repo.delete_image(image_id)
+    assert repo.get_image(image_id) is None
+    assert repo.search_by_tags(["t"]) == []
+
+
+def test_cache_evicts_least_recently_used(repo):
+    repo.CACHE_SIZE = 2
+    first, second, third = (
+        repo.store_image(Image.new("RGB", (4, 4)), f"img{i}", "1", "user")
+        for i in range(3)
+    )
+    repo.get_image(first)
+    repo.get_image(second)
+    repo.get_image(first)
+    repo.get_image(third)
+
+    assert list(repo._cache) == [first, third]
+
+
+def test_cache_survives_concurrent_access(repo):
+    """Reads, evictions and deletes from worker threads do not race"""
+    repo.CACHE_SIZE = 2
+    image_ids = [
+        repo.store_image(Image.new("RGB", (4, 4)), f"img{i}", "1", "user")
+        for i in range(6)
+    ]
+    errors = []
+
+    def reader():
+        try:
+            for _ in range(200):
+                for image_id in image_ids[1:]:
+                    assert repo.get_image(image_id) is not None
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=reader) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for _ in range(200):
+        assert repo.get_image(image_ids[0]) is not None
+    for thread in threads:
+        thread.join()
+
+    assert not errors
+    assert len(repo._cache) <= repo.CACHE_SIZE
@@ -0,0 +1,41 @@
+from io import BytesIO
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from core import utils
+from core.utils import ImageUtils
+
+
+@pytest.fixture
+def png_bytes():
+    buffer = BytesIO()
+    Image.new("RGB", (100, 100), "red").save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+@pytest.mark.parametrize("use_cv2", [True, False])
+def test_decode_image_enforces_pixel_limit(png_bytes, monkeypatch, use_cv2):
+    """OpenCV decoding must not bypass Pillow's decompression bomb check"""
+    if not use_cv2:
+        monkeypatch.setattr(utils, "cv2", None)
+    elif utils.cv2 is None:
+        pytest.skip("OpenCV not installed")
+
+    assert np.asarray(ImageUtils.decode_image(png_bytes)).shape == (100, 100, 3)
+
+    monkeypatch.setattr(Image, "MAX_IMAGE_PIXELS", 1000)
+    with pytest.raises(Image.DecompressionBombError):
+        ImageUtils.decode_image(png_bytes)
+
+
+def test_decode_image_keeps_gif_frames():
+    """GIFs are decoded by Pillow, not flattened to one RGB frame by OpenCV"""
+    frames = [Image.new("RGB", (8, 8), color) for color in ("red", "blue")]
+    buffer = BytesIO()
+    frames[0].save(buffer, format="GIF", save_all=True, append_images=frames[1:])
+
+    image = ImageUtils.decode_image(buffer.getvalue())
+    assert image.format == "GIF"
+    assert image.n_frames == 2